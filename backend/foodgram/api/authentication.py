@@ -0,0 +1,88 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_KEY = 'auth-token:{digest}'
+
+
+def get_token_cache():
+    """Кеш токенов или None, если общий кеш не настроен."""
+    alias = settings.AUTH_TOKEN_CACHE
+    return caches[alias] if alias else None
+
+
+def get_token_cache_key(key):
+    # Сам токен в ключ кеша не попадает
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return TOKEN_KEY.format(digest=digest)
+
+
+def invalidate_token(key):
+    """Убирает из кеша пользователя, найденного по токену."""
+    cache = get_token_cache()
+    if cache is not None:
+        cache.delete(get_token_cache_key(key))
+
+
+def invalidate_user_tokens(user_id):
+    """Убирает из кеша все токены пользователя."""
+    cache = get_token_cache()
+    if cache is None:
+        return
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    cache.delete_many([get_token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, которая кеширует пользователя по токену.
+
+    Кеш включается настройкой AUTH_TOKEN_CACHE и должен быть общим для
+    всех процессов: иначе выход, смена пароля и деактивация сбросят
+    запись только в одном воркере. Запись живет AUTH_TOKEN_CACHE_TIMEOUT
+    секунд. Хеш пароля в кеш не попадает: у восстановленного
+    пользователя поле password отложено и читается из базы по запросу.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        if cache is None:
+            return super().authenticate_credentials(key)
+        cache_key = get_token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return self.restore_credentials(key, cached)
+        user, token = super().authenticate_credentials(key)
+        cache.set(
+            cache_key,
+            self.dump_credentials(user, token),
+            settings.AUTH_TOKEN_CACHE_TIMEOUT
+        )
+        return user, token
+
+    @staticmethod
+    def get_cached_fields():
+        return [
+            field.attname for field in get_user_model()._meta.concrete_fields
+            if field.name != 'password'
+        ]
+
+    def dump_credentials(self, user, token):
+        return {
+            'created': token.created,
+            'user': {
+                name: getattr(user, name) for name in self.get_cached_fields()
+            },
+        }
+
+    def restore_credentials(self, key, cached):
+        values = cached['user']
+        user = get_user_model().from_db(
+            DEFAULT_DB_ALIAS, list(values), list(values.values())
+        )
+        token = Token(key=key, user=user, created=cached['created'])
+        return user, token
@@ -0,0 +1,87 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.response import Response
+
+VERSION_KEY = 'version:{label}'
+RESPONSE_KEY = 'response:{etag}'
+
+
+def get_version(model):
+    """Возвращает версию данных модели — время их последнего изменения."""
+    return cache.get_or_set(
+        VERSION_KEY.format(label=model._meta.label_lower), time.time, None
+    )
+
+
+def bump_version(model):
+    """Помечает закешированные данные модели как устаревшие."""
+    cache.set(
+        VERSION_KEY.format(label=model._meta.label_lower), time.time(), None
+    )
+
+
+class VersionedCacheMixin:
+    """Кеширует ответы list и retrieve справочных эндпоинтов.
+
+    ETag строится из версии моделей cache_models и адреса запроса.
+    Совпавший If-None-Match дает 304, иначе данные берутся из кеша или
+    сериализуются и кладутся туда. Версию меняют сигналы моделей.
+    Запросы с параметрами из uncached_params получают ETag, но в кеш
+    не попадают: у каждого варианта своя запись, и они вытеснили бы
+    остальное содержимое кеша.
+    """
+    cache_models = ()
+    uncached_params = ()
+
+    def get_etag(self, request):
+        versions = ':'.join(
+            str(get_version(model)) for model in self.cache_models
+        )
+        key = (f'{versions}:{request.accepted_renderer.format}:'
+               f'{request.get_full_path()}')
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def is_cacheable(self, request):
+        return not any(
+            request.query_params.get(param)
+            for param in self.uncached_params
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = get_conditional_response(request, etag=f'"{etag}"')
+        if response is None and not self.is_cacheable(request):
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        elif response is None:
+            key = RESPONSE_KEY.format(etag=etag)
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(
+                    key, response.data, settings.REFERENCE_CACHE_TIMEOUT
+                )
+            else:
+                response = Response(data)
+        response['ETag'] = f'"{etag}"'
+        patch_cache_control(
+            response, public=True, max_age=settings.REFERENCE_CACHE_MAX_AGE
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
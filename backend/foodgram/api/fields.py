@@ -0,0 +1,125 @@
+import binascii
+import re
+import uuid
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+NON_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """Base64ImageField, который декодирует данные порциями во временный файл.
+
+    Декодированное изображение целиком в памяти не держится: каждая
+    порция base64 сразу пишется на диск, а проверка Pillow читает файл.
+    Пиксели при этом не декодируются — пережатие идет в фоновой задаче.
+    """
+    CHUNK_SIZE = 64 * 1024
+    MARKER = ';base64,'
+
+    def decode_chunks(self, data, start):
+        """Декодирует base64 порциями, пропуская переводы строк и пробелы.
+
+        Как и base64.b64decode, посторонние символы отбрасываются, а
+        остаток, не кратный четырем символам, переносится в следующую
+        порцию.
+        """
+        rest = ''
+        for position in range(start, len(data), self.CHUNK_SIZE):
+            chunk = rest + NON_BASE64.sub(
+                '', data[position:position + self.CHUNK_SIZE]
+            )
+            end = len(chunk) - len(chunk) % 4
+            rest = chunk[end:]
+            yield binascii.a2b_base64(chunk[:end])
+        if rest:
+            yield binascii.a2b_base64(rest)
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+
+        start = 0
+        content_type = None
+        marker = base64_data.find(self.MARKER, 0, 256)
+        if marker != -1:
+            start = marker + len(self.MARKER)
+            if self.trust_provided_content_type:
+                content_type = base64_data[:marker].replace('data:', '')
+
+        upload = TemporaryUploadedFile(
+            name='upload', content_type=content_type, size=0, charset=None
+        )
+        try:
+            for chunk in self.decode_chunks(base64_data, start):
+                upload.write(chunk)
+            upload.size = upload.tell()
+            upload.seek(0)
+            with Image.open(upload) as image:
+                extension = image.format.lower()
+                image.verify()
+        except (binascii.Error, OSError, SyntaxError, ValueError,
+                Image.DecompressionBombError):
+            upload.close()
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+
+        extension = 'jpg' if extension == 'jpeg' else extension
+        if extension not in self.ALLOWED_TYPES:
+            upload.close()
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        upload.seek(0)
+        upload.name = f'{uuid.uuid4()}.{extension}'
+        return serializers.ImageField.to_internal_value(self, upload)
+
+
+def get_objects_in_bulk(queryset, pks):
+    """Загружает объекты по списку id одним запросом in_bulk.
+
+    Если каких-то id нет, ошибка перечисляет их все сразу.
+    """
+    objects = queryset.in_bulk(set(pks))
+    missing = sorted(set(pks) - objects.keys())
+    if missing:
+        raise serializers.ValidationError(
+            'Не найдены объекты с id: ' + ', '.join(map(str, missing))
+        )
+    return objects
+
+
+class PrimaryKeyListField(serializers.ListField):
+    """Список id, который превращается в объекты одним запросом.
+
+    Замена PrimaryKeyRelatedField(many=True), который делает
+    отдельный запрос на каждый id.
+    """
+    child = serializers.IntegerField(min_value=1)
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pks = super().to_internal_value(data)
+        objects = get_objects_in_bulk(self.queryset.all(), pks)
+        return [objects[pk] for pk in dict.fromkeys(pks)]
+
+    def to_representation(self, value):
+        if hasattr(value, 'all'):
+            value = value.all()
+        return [item.pk for item in value]
+
+
+class ThumbnailField(serializers.ImageField):
+    """Миниатюра рецепта; пока она готовится, отдается исходное изображение."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) or instance.image
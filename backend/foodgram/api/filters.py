@@ -1,12 +1,18 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
-from recipes.models import Recipes, Tags
+from recipes.models import Favourites, Recipes, RecipeTag, Shoplist, Tags
+from recipes.search import get_ingredient_index
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 
 
 class RecipesFilter(filters.FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         queryset=Tags.objects.all(),
         field_name='tags__slug',
-        to_field_name='slug'
+        to_field_name='slug',
+        method='filter_tags'
     )
     is_favorited = filters.BooleanFilter(
         method='custom_favorited'
@@ -14,19 +20,68 @@ class RecipesFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='custom_shopping_cart'
     )
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'Сначала популярные'),),
+        method='custom_ordering'
+    )
 
     class Meta:
         model = Recipes
         fields = ('tags', 'is_favorited', 'is_in_shopping_cart', 'author')
 
+    # Фильтры ниже используют подзапросы EXISTS, а не JOIN: так рецепт
+    # не дублируется при совпадении нескольких тегов, а фильтры
+    # комбинируются без сброса уже примененных условий.
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipes=OuterRef('pk'), tags__in=value
+        )))
+
     def custom_favorited(self, queryset, name, value):
         user = self.request.user
-        if value:
-            return queryset.filter(favorite__user=user)
-        return Recipes.objects.all()
+        if not value:
+            return queryset
+        if user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(Favourites.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )))
 
     def custom_shopping_cart(self, queryset, name, value):
         user = self.request.user
-        if value:
-            return queryset.filter(shop_list__user=user)
-        return Recipes.objects.all()
+        if not value:
+            return queryset
+        if user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(Shoplist.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )))
+
+    def custom_ordering(self, queryset, name, value):
+        # Сортировка по счетчику использует индекс recipes_popular_idx
+        return queryset.order_by('-favorites_count', '-pub_date')
+
+
+class IngredientSearchFilter(BaseFilterBackend):
+    """Подсказки для формы рецепта: сначала совпадения по началу названия.
+
+    Поиск идет по индексу в памяти, а не по базе, и ограничен
+    параметром limit.
+    """
+    search_param = api_settings.SEARCH_PARAM
+    limit_param = 'limit'
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_param])
+        except (KeyError, ValueError):
+            return settings.INGREDIENT_SEARCH_LIMIT
+        return max(1, min(limit, settings.INGREDIENT_SEARCH_MAX_LIMIT))
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query or view.action != 'list':
+            return queryset
+        return get_ingredient_index().search(query, self.get_limit(request))
@@ -0,0 +1,188 @@
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from api.scenario import get_api_routes, make_dataset, run_cases
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+from recipes.jobs import get_job_runner
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+SAFE_METHODS = ('get', 'head')
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет все эндпоинты api/urls.py на данных нескольких '
+            'размеров, считает SQL-запросы и время ответа и сравнивает '
+            'их с сохраненным базовым уровнем')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1, 8],
+            help='Размеры наборов данных (подписки, избранное и т.д.)'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз повторять безопасные запросы для замера времени'
+        )
+        parser.add_argument(
+            '--baseline', default=str(settings.BASE_DIR / 'api_baseline.json'),
+            help='Файл базового уровня в формате JSON'
+        )
+        parser.add_argument(
+            '--update', action='store_true',
+            help='Записать результаты как новый базовый уровень'
+        )
+        parser.add_argument(
+            '--max-slowdown', type=float, default=1.5,
+            help='Во сколько раз запрос может стать медленнее базового'
+        )
+        parser.add_argument(
+            '--min-slowdown-ms', type=float, default=5.0,
+            help='Замедления меньше этого числа миллисекунд не считаются'
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = max(1, options['repeat'])
+        sizes = sorted(set(options['sizes']))
+        results = {}
+        for size in sizes:
+            for name, result in self.profile(size).items():
+                results.setdefault(name, {})[str(size)] = result
+        failures = self.find_regressions(results, sizes)
+
+        baseline_path = Path(options['baseline'])
+        if baseline_path.exists() and not options['update']:
+            baseline = json.loads(baseline_path.read_text())
+            failures += self.compare(results, baseline, options)
+        elif not options['update']:
+            self.stdout.write(self.style.WARNING(
+                f'Базовый уровень {baseline_path} не найден, '
+                'запустите команду с --update'
+            ))
+
+        self.report(results, sizes)
+        if options['update']:
+            baseline_path.write_text(
+                json.dumps(results, indent=2, ensure_ascii=False,
+                           sort_keys=True) + '\n'
+            )
+            self.stdout.write(f'Базовый уровень записан в {baseline_path}')
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено'))
+
+    def find_regressions(self, results, sizes):
+        """Ошибки ответов, непроверенные маршруты и рост числа запросов."""
+        failures = [
+            f'{name} [{size}]: ответ {result["status"]}'
+            for name, by_size in results.items()
+            for size, result in by_size.items()
+            if result['unexpected_status']
+        ]
+        for route in sorted(get_api_routes() - self.covered):
+            failures.append(f'Маршрут не проверяется: {route}')
+        smallest, largest = str(sizes[0]), str(sizes[-1])
+        for name, by_size in results.items():
+            if by_size[largest]['queries'] > by_size[smallest]['queries']:
+                failures.append(
+                    f'{name}: число запросов растет с размером данных '
+                    f'({by_size[smallest]["queries"]} → '
+                    f'{by_size[largest]["queries"]})'
+                )
+        return failures
+
+    def compare(self, results, baseline, options):
+        failures = []
+        for name, by_size in results.items():
+            for size, result in by_size.items():
+                expected = baseline.get(name, {}).get(size)
+                if expected is None:
+                    continue
+                if result['queries'] > expected['queries']:
+                    failures.append(
+                        f'{name} [{size}]: запросов {result["queries"]}, '
+                        f'в базовом уровне {expected["queries"]}'
+                    )
+                slowdown = result['ms'] - expected['ms']
+                if (result['ms'] > expected['ms'] * options['max_slowdown']
+                        and slowdown > options['min_slowdown_ms']):
+                    failures.append(
+                        f'{name} [{size}]: {result["ms"]:.1f} мс, '
+                        f'в базовом уровне {expected["ms"]:.1f} мс'
+                    )
+        return failures
+
+    def report(self, results, sizes):
+        header = ''.join(f'{size:>18}' for size in sizes)
+        self.stdout.write(f'{"эндпоинт":<26}{header}')
+        for name, by_size in results.items():
+            cells = ''.join(
+                f'{by_size[str(size)]["queries"]:>6} q '
+                f'{by_size[str(size)]["ms"]:>7.1f} ms'
+                for size in sizes
+            )
+            self.stdout.write(f'{name:<26}{cells}')
+
+    def profile(self, size):
+        """Создает данные размера size, прогоняет запросы и откатывает все."""
+        media = tempfile.TemporaryDirectory()
+        overrides = override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            MEDIA_ROOT=media.name,
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'profile-api-{size}',
+            }},
+            JOB_RUNNER={
+                'BACKEND': 'recipes.jobs.ImmediateJobRunner',
+                'OPTIONS': {},
+            },
+        )
+        self.results = {}
+        self.covered = set()
+        get_job_runner.cache_clear()
+        try:
+            with media, overrides, transaction.atomic():
+                context = make_dataset(size)
+                token = Token.objects.create(user=context['actor'])
+                self.client = APIClient()
+                self.client.credentials(
+                    HTTP_AUTHORIZATION=f'Token {token.key}'
+                )
+                run_cases(context, self.measure)
+                transaction.set_rollback(True)
+        finally:
+            get_job_runner.cache_clear()
+        return self.results
+
+    def measure(self, case):
+        """Выполняет запрос; для безопасных методов замеряет время повторами.
+
+        Число запросов берется из первого, «холодного» вызова.
+        """
+        self.covered.add(resolve(case.url.split('?')[0]).route)
+        timings = []
+        runs = self.repeat if case.method in SAFE_METHODS else 1
+        for run in range(runs):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(self.client, case.method)(
+                    case.url, case.data, format='json'
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+            if run == 0:
+                first, first_response = len(queries), response
+        self.results[case.name] = {
+            'queries': first,
+            'ms': round(statistics.median(timings), 2),
+            'status': response.status_code,
+            'unexpected_status': response.status_code != case.status,
+        }
+        return first_response
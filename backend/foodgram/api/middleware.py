@@ -0,0 +1,88 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Считает SQL-запросы и время в БД за один HTTP-запрос.
+
+    Подключается через connection.execute_wrapper, поэтому работает
+    и без DEBUG, когда connection.queries не заполняется.
+    """
+
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.duration += elapsed
+            self.statements[sql] += 1
+            if elapsed >= self.slow_query_ms:
+                self.slow.append((elapsed, sql))
+
+
+class QueryInstrumentationMiddleware:
+    """Замеряет запросы к БД и время ответа, добавляет Server-Timing.
+
+    Включается настройкой QUERY_INSTRUMENTATION['ENABLED']; иначе Django
+    исключает middleware из цепочки и накладных расходов нет.
+    """
+
+    def __init__(self, get_response):
+        self.options = settings.QUERY_INSTRUMENTATION
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats(self.options['SLOW_QUERY_MS'])
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        total = (time.perf_counter() - started) * 1000
+        if self.options['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={stats.duration:.1f};desc="{stats.count} queries", '
+                f'app;dur={total - stats.duration:.1f}, '
+                f'total;dur={total:.1f}'
+            )
+        self.log(request, stats, total)
+        return response
+
+    def log(self, request, stats, total):
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+        if total >= self.options['SLOW_REQUEST_MS']:
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.1f мс, '
+                'SQL: %d запросов за %.1f мс',
+                request.method, request.get_full_path(), view, total,
+                stats.count, stats.duration
+            )
+        for elapsed, sql in stats.slow:
+            logger.warning(
+                'Медленный SQL в %s: %.1f мс: %s', view, elapsed, sql
+            )
+        for sql, times in stats.statements.items():
+            if times >= self.options['DUPLICATE_QUERY_THRESHOLD']:
+                logger.warning(
+                    'Повторяющийся SQL в %s: %d раз: %s', view, times, sql
+                )
@@ -0,0 +1,24 @@
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+class UniqueCreateMixin:
+    """Превращает нарушение ограничения уникальности в ошибку валидации.
+
+    Вместо предварительного SELECT, как у UniqueTogetherValidator, запись
+    сразу вставляется в базу, а дубликат отсекает ограничение в БД.
+    Сообщение об ошибке задается атрибутом unique_error_message.
+    """
+    unique_error_message = 'Такая запись уже существует'
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    self.unique_error_message
+                ]
+            })
@@ -0,0 +1,42 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная пагинация ленты по (pub_date, id) без OFFSET и COUNT(*)."""
+    ordering = ('-pub_date', '-id')
+
+
+class RecipePagination(PageNumberPagination):
+    """Постраничная пагинация с переключением на курсорную.
+
+    Курсор включается параметром ?pagination=cursor, а следующие страницы
+    запрашиваются по ссылкам next/previous с параметром ?cursor=.
+    Без них ответ остается прежним для текущего фронтенда.
+    Курсор задает свою сортировку, поэтому с ?ordering= он не сочетается:
+    позиция по меняющемуся числу лайков дала бы пропуски и повторы.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = RecipeCursorPagination.cursor_query_param
+    ordering_query_param = 'ordering'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.cursor_query_param in request.query_params):
+            if request.query_params.get(self.ordering_query_param):
+                raise ValidationError({
+                    self.ordering_query_param: [
+                        'Сортировка недоступна при курсорной пагинации'
+                    ]
+                })
+            self.cursor_paginator = RecipeCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,45 @@
+from django.utils.functional import cached_property
+from recipes.models import Favourites, Follow, Shoplist
+
+
+class UserRelations:
+    """Связи пользователя с авторами и рецептами в виде множеств id.
+
+    Каждое множество загружается одним запросом при первом обращении,
+    после чего проверка принадлежности не обращается к базе.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def followed_ids(self):
+        return set(Follow.objects.filter(
+            user=self.user
+        ).values_list('author_id', flat=True))
+
+    @cached_property
+    def favourite_ids(self):
+        return set(Favourites.objects.filter(
+            user=self.user
+        ).values_list('recipe_id', flat=True))
+
+    @cached_property
+    def cart_ids(self):
+        return set(Shoplist.objects.filter(
+            user=self.user
+        ).values_list('recipe_id', flat=True))
+
+
+def get_relations(request):
+    """Возвращает связи текущего пользователя, общие на весь запрос.
+
+    Для анонимного пользователя или вне запроса возвращает None.
+    """
+    if request is None or request.user.is_anonymous:
+        return None
+    relations = getattr(request, '_user_relations', None)
+    if relations is None or relations.user != request.user:
+        relations = UserRelations(request.user)
+        request._user_relations = relations
+    return relations
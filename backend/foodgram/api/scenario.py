@@ -0,0 +1,221 @@
+"""Сценарий обхода всех маршрутов API.
+
+Один и тот же сценарий использует команда profile_api для замеров и
+тесты числа SQL-запросов, поэтому маршрут достаточно добавить сюда.
+"""
+import base64
+import io
+from collections import namedtuple
+
+from api.caching import bump_version
+from django.contrib.auth.hashers import make_password
+from django.urls import URLPattern, get_resolver
+from PIL import Image
+from recipes.models import (Favourites, Follow, Ingredients, RecipeIngredient,
+                            Recipes, RecipeTag, Shoplist, Tags)
+from users.models import User
+
+PREFIX = 'scenario-'
+PASSWORD = 'Scenario-password-1'
+
+Case = namedtuple('Case', 'name method url data status')
+
+
+def get_api_routes(patterns=None, prefix='api/'):
+    """Все маршруты из api/urls.py, кроме вариантов с суффиксом формата."""
+    if patterns is None:
+        patterns = get_resolver('api.urls').url_patterns
+    routes = set()
+    for pattern in patterns:
+        # Так же, как ResolverMatch.route: без ^ у вложенных регулярок
+        route = prefix + str(pattern.pattern).lstrip('^')
+        if isinstance(pattern, URLPattern):
+            if '<format>' not in route and '(?P<format>' not in route:
+                routes.add(route)
+        else:
+            routes |= get_api_routes(pattern.url_patterns, route)
+    return routes
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'green').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+def make_dataset(size):
+    """Создает данные, в которых размер size задает объем всех связей.
+
+    Данные строятся без случайности: у пользователя size подписок,
+    size рецептов в избранном и в списке покупок, и фильтрованные
+    выборки сценария на любом размере возвращают рецепты.
+    """
+    User.objects.bulk_create(
+        User(
+            username=f'{PREFIX}{number}',
+            email=f'{PREFIX}{number}@example.com',
+            first_name='Имя',
+            last_name=f'Фамилия {number}',
+        )
+        for number in range(size + 2)
+    )
+    actor, *authors = User.objects.filter(
+        username__startswith=PREFIX
+    ).order_by('id')
+    actor.password = make_password(PASSWORD)
+    actor.save(update_fields=['password'])
+    followed, stranger = authors[:-1], authors[-1]
+
+    Tags.objects.bulk_create(
+        Tags(name=f'Тег {PREFIX}{number}', color='#ffffff',
+             slug=f'{PREFIX}{number}')
+        for number in range(3)
+    )
+    tags = list(Tags.objects.filter(slug__startswith=PREFIX).order_by('id'))
+    Ingredients.objects.bulk_create(
+        Ingredients(name=f'Ингредиент {PREFIX}{number}', measurement_unit='г')
+        for number in range(10)
+    )
+    ingredients = list(Ingredients.objects.filter(
+        name__startswith=f'Ингредиент {PREFIX}'
+    ).order_by('id'))
+    bump_version(Ingredients)
+
+    Recipes.objects.bulk_create(
+        Recipes(
+            name=f'Рецепт {PREFIX}{number}',
+            author=authors[number % len(authors)],
+            image='recipe.jpg',
+            text='Описание',
+            cooking_time=10
+        )
+        for number in range(size * 4)
+    )
+    recipes = list(Recipes.objects.filter(
+        name__startswith=f'Рецепт {PREFIX}'
+    ).order_by('id'))
+    RecipeTag.objects.bulk_create(
+        RecipeTag(recipes=recipe, tags=tags[number % len(tags)])
+        for number, recipe in enumerate(recipes)
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipes=recipe,
+            ingredients=ingredients[(number + shift) % len(ingredients)],
+            amount=shift + 1
+        )
+        for number, recipe in enumerate(recipes)
+        for shift in range(3)
+    )
+    Follow.objects.bulk_create(
+        Follow(user=actor, author=author) for author in followed
+    )
+    # Первый рецепт с первым тегом всегда попадает в избранное и покупки
+    for model in (Favourites, Shoplist):
+        model.objects.bulk_create(
+            model(user=actor, recipe=recipe) for recipe in recipes[:size]
+        )
+    Recipes.objects.rebuild_counters()
+    return {
+        'size': size,
+        'actor': actor,
+        'stranger': stranger,
+        'recipe': recipes[0],
+        'free_recipe': recipes[-1],
+        'tag': tags[0],
+        'ingredients': ingredients[:5],
+    }
+
+
+def get_cases(context):
+    """Запросы сценария по порядку.
+
+    Генератор получает через send() ответ на предыдущий запрос, чтобы
+    брать из него id созданных объектов.
+    """
+    size = context['size']
+    recipe = context['recipe']
+    free = context['free_recipe'].id
+    stranger = context['stranger'].id
+    tag = context['tag']
+    yield Case('api-root', 'get', '/api/', None, 200)
+    yield Case('users-list', 'get', '/api/users/', None, 200)
+    yield Case('users-detail', 'get', f'/api/users/{recipe.author_id}/',
+               None, 200)
+    yield Case('users-me', 'get', '/api/users/me/', None, 200)
+    yield Case('subscriptions', 'get',
+               f'/api/users/subscriptions/?recipes_limit={size}', None, 200)
+    yield Case('subscribe', 'post', f'/api/users/{stranger}/subscribe/',
+               None, 201)
+    yield Case('unsubscribe', 'delete', f'/api/users/{stranger}/subscribe/',
+               None, 204)
+    yield Case('tags-list', 'get', '/api/tags/', None, 200)
+    yield Case('tags-detail', 'get', f'/api/tags/{tag.id}/', None, 200)
+    yield Case('ingredients-list', 'get', '/api/ingredients/', None, 200)
+    yield Case('ingredients-search', 'get',
+               f'/api/ingredients/?name=ингр&limit={size}', None, 200)
+    yield Case('ingredients-detail', 'get',
+               f'/api/ingredients/{context["ingredients"][0].id}/',
+               None, 200)
+    yield Case('recipes-list', 'get', '/api/recipes/', None, 200)
+    yield Case('recipes-filtered', 'get',
+               f'/api/recipes/?tags={tag.slug}&is_favorited=1'
+               '&ordering=popular', None, 200)
+    yield Case('recipes-cursor', 'get', '/api/recipes/?pagination=cursor',
+               None, 200)
+    yield Case('recipes-detail', 'get', f'/api/recipes/{recipe.id}/',
+               None, 200)
+    response = yield Case('recipes-create', 'post', '/api/recipes/', {
+        'ingredients': [
+            {'id': ingredient.id, 'amount': 10}
+            for ingredient in context['ingredients']
+        ],
+        'tags': [tag.id],
+        'image': make_image(),
+        'name': 'Проверочный рецепт',
+        'text': 'Описание',
+        'cooking_time': 10,
+    }, 201)
+    created = response.data['id']
+    yield Case('recipes-update', 'patch', f'/api/recipes/{created}/',
+               {'name': 'Проверочный рецепт 2', 'cooking_time': 15}, 200)
+    yield Case('favorite', 'post', f'/api/recipes/{free}/favorite/',
+               None, 201)
+    yield Case('unfavorite', 'delete', f'/api/recipes/{free}/favorite/',
+               None, 204)
+    yield Case('cart-add', 'post', f'/api/recipes/{free}/shopping_cart/',
+               None, 201)
+    yield Case('cart-remove', 'delete', f'/api/recipes/{free}/shopping_cart/',
+               None, 204)
+    for export_format in ('pdf', 'txt', 'csv'):
+        yield Case(f'download-{export_format}', 'get',
+                   '/api/recipes/download_shopping_cart/'
+                   f'?format={export_format}', None, 200)
+    response = yield Case('shopping-job-create', 'post',
+                          '/api/recipes/download_shopping_cart/jobs/',
+                          {'format': 'txt'}, 202)
+    job = response.data['id']
+    yield Case('shopping-job', 'get',
+               f'/api/recipes/download_shopping_cart/jobs/{job}/', None, 200)
+    yield Case('shopping-job-result', 'get',
+               f'/api/recipes/download_shopping_cart/jobs/{job}/result/',
+               None, 200)
+    yield Case('recipes-delete', 'delete', f'/api/recipes/{created}/',
+               None, 204)
+    yield Case('set-password', 'post', '/api/users/set_password/', {
+        'current_password': PASSWORD,
+        'new_password': 'Scenario-password-2',
+    }, 204)
+
+
+def run_cases(context, call):
+    """Выполняет сценарий; call(case) делает запрос и возвращает ответ."""
+    cases = get_cases(context)
+    response = None
+    while True:
+        try:
+            case = cases.send(response)
+        except StopIteration:
+            return
+        response = call(case)
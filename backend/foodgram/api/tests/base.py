@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import override_settings
+from recipes.jobs import get_job_runner
+from recipes.models import (Ingredients, RecipeIngredient, Recipes, RecipeTag,
+                            Tags)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def create_users(count, start=0):
+    return [
+        User.objects.create(
+            username=f'user{number}',
+            email=f'user{number}@example.com',
+            first_name='Имя',
+            last_name=f'Фамилия {number}',
+        )
+        for number in range(start, start + count)
+    ]
+
+
+def create_tags(count):
+    return [
+        Tags.objects.create(
+            name=f'Тег {number}', color='#ffffff', slug=f'tag{number}'
+        )
+        for number in range(count)
+    ]
+
+
+def create_ingredients(count):
+    return [
+        Ingredients.objects.create(
+            name=f'Ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(count)
+    ]
+
+
+def create_recipes(authors, count, tags, ingredients, per_recipe=3):
+    """Рецепты по кругу у authors, у каждого per_recipe ингредиентов."""
+    recipes = []
+    for number in range(count):
+        recipe = Recipes.objects.create(
+            name=f'Рецепт {number}',
+            author=authors[number % len(authors)],
+            image='recipe.jpg',
+            text='Описание',
+            cooking_time=10
+        )
+        RecipeTag.objects.create(
+            recipes=recipe, tags=tags[number % len(tags)]
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipes=recipe,
+                ingredients=ingredients[(number + shift) % len(ingredients)],
+                amount=shift + 1
+            )
+            for shift in range(per_recipe)
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+def token_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'foodgram-tests',
+    }},
+    JOB_RUNNER={'BACKEND': 'recipes.jobs.ImmediateJobRunner', 'OPTIONS': {}},
+)
+class FoodgramTestCase(APITestCase):
+    """Общая база тестов: отдельные медиафайлы, кеш и синхронные задачи."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        get_job_runner.cache_clear()
+        self.addCleanup(get_job_runner.cache_clear)
@@ -0,0 +1,77 @@
+from api.authentication import get_token_cache_key
+from api.tests.base import FoodgramTestCase, create_users, token_client
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+ME_URL = '/api/users/me/'
+
+
+@override_settings(AUTH_TOKEN_CACHE='default')
+class CachedTokenAuthenticationTests(FoodgramTestCase):
+    """Пользователь берется из кеша, пока токен и запись не менялись."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_users(1)[0]
+        self.user.password = make_password('Old-password-1')
+        self.user.save()
+        self.client = token_client(self.user)
+        self.token = Token.objects.get(user=self.user)
+
+    def test_warm_cache_skips_token_query(self):
+        # Токен с пользователем и подписки, которые читает сам эндпоинт
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.assertIsNotNone(cache.get(get_token_cache_key(self.token.key)))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    def test_password_hash_is_not_cached(self):
+        self.client.get(ME_URL)
+        cached = cache.get(get_token_cache_key(self.token.key))
+        self.assertNotIn('password', cached['user'])
+        self.assertNotIn(self.user.password, repr(cached))
+
+    def test_logout_invalidates_cache(self):
+        self.client.get(ME_URL)
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(cache.get(get_token_cache_key(self.token.key)))
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_set_password_invalidates_cache(self):
+        self.client.get(ME_URL)
+        url = '/api/users/set_password/'
+        response = self.client.post(url, {
+            'current_password': 'Old-password-1',
+            'new_password': 'New-password-2',
+        })
+        self.assertEqual(response.status_code, 204)
+        # Со старым хешем из кеша прежний пароль прошел бы проверку
+        response = self.client.post(url, {
+            'current_password': 'Old-password-1',
+            'new_password': 'New-password-3',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('current_password', response.data)
+
+    def test_deactivation_invalidates_cache(self):
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+
+class TokenAuthenticationWithoutCacheTests(FoodgramTestCase):
+    """Без общего кеша токен проверяется по базе при каждом запросе."""
+
+    def test_cache_is_bypassed(self):
+        user = create_users(1)[0]
+        client = token_client(user)
+        for _ in range(2):
+            with self.assertNumQueries(2):
+                self.assertEqual(client.get(ME_URL).status_code, 200)
+        key = Token.objects.get(user=user).key
+        self.assertIsNone(cache.get(get_token_cache_key(key)))
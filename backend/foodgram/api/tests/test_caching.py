@@ -0,0 +1,36 @@
+from api.caching import RESPONSE_KEY
+from api.tests.base import FoodgramTestCase, create_ingredients
+from django.core.cache import cache
+
+
+class ReferenceCacheTests(FoodgramTestCase):
+    """Справочники кешируются, подсказки поиска — нет."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_ingredients(5)
+
+    def cached_data(self, response):
+        etag = response['ETag'].strip('"')
+        return cache.get(RESPONSE_KEY.format(etag=etag))
+
+    def test_list_is_cached(self):
+        response = self.client.get('/api/ingredients/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.cached_data(response), response.data)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.client.get('/api/ingredients/').data, response.data
+            )
+
+    def test_search_is_not_cached(self):
+        response = self.client.get('/api/ingredients/?name=ингр')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+        self.assertIsNone(self.cached_data(response))
+        # Условный запрос по-прежнему работает
+        repeated = self.client.get(
+            '/api/ingredients/?name=ингр',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(repeated.status_code, 304)
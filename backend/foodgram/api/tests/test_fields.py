@@ -0,0 +1,47 @@
+import base64
+import io
+import os
+
+from api.fields import StreamingBase64ImageField
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework import serializers
+
+
+def make_png(size=(300, 300)):
+    # Шум не сжимается, поэтому данные занимают несколько порций
+    image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class StreamingBase64ImageFieldTests(SimpleTestCase):
+    """Поле принимает то же, что и base64.b64decode в Base64ImageField."""
+
+    def setUp(self):
+        self.field = StreamingBase64ImageField()
+        self.png = make_png()
+
+    def decode(self, data):
+        upload = self.field.to_internal_value(data)
+        self.addCleanup(upload.close)
+        upload.seek(0)
+        return upload.read()
+
+    def test_plain_payload(self):
+        data = base64.b64encode(self.png).decode()
+        self.assertGreater(len(data), self.field.CHUNK_SIZE)
+        self.assertEqual(self.decode(data), self.png)
+
+    def test_wrapped_payload(self):
+        data = base64.encodebytes(self.png).decode()
+        for payload in (data, data.replace('\n', '\r\n'),
+                        'data:image/png;base64,' + data):
+            with self.subTest(payload=payload[:30]):
+                self.assertEqual(self.decode(payload), self.png)
+
+    def test_truncated_payload_is_rejected(self):
+        data = base64.b64encode(self.png).decode()[:-5]
+        with self.assertRaises(serializers.ValidationError):
+            self.field.to_internal_value(data)
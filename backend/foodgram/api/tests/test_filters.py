@@ -0,0 +1,152 @@
+import io
+import os
+import statistics
+import sys
+import time
+from unittest import skipUnless
+
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from django.core.management import call_command
+from recipes.models import Favourites, Recipes, Shoplist
+from users.models import User
+
+
+class RecipeFilterTests(FoodgramTestCase):
+    """Фильтры списка рецептов сочетаются и не дублируют рецепты."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = create_users(2)
+        cls.tags = create_tags(2)
+        cls.recipes = create_recipes(
+            [cls.author], 6, cls.tags, create_ingredients(3)
+        )
+        # Первому тегу принадлежат рецепты с четными номерами
+        cls.recipes[1].tags.add(cls.tags[0])
+        Favourites.objects.bulk_create(
+            Favourites(user=cls.user, recipe=recipe)
+            for recipe in cls.recipes[:3]
+        )
+        Shoplist.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/recipes/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(recipe['id'] for recipe in response.data['results'])
+
+    def ids(self, *numbers):
+        return sorted(self.recipes[number].id for number in numbers)
+
+    def test_filters_compose(self):
+        cases = (
+            ('tags=tag0', self.ids(0, 1, 2, 4)),
+            ('tags=tag0&tags=tag1', self.ids(0, 1, 2, 3, 4, 5)),
+            ('is_favorited=0&tags=tag0', self.ids(0, 1, 2, 4)),
+            ('is_favorited=1&tags=tag0', self.ids(0, 1, 2)),
+            ('is_favorited=1&tags=tag1', self.ids(1)),
+            ('is_favorited=1&is_in_shopping_cart=1', self.ids(0)),
+            ('is_in_shopping_cart=0&tags=tag1', self.ids(1, 3, 5)),
+        )
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(self.get_ids(query), expected)
+
+    def test_anonymous_favorited_is_empty(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get_ids('is_favorited=1&tags=tag0'), [])
+        self.assertEqual(self.get_ids('is_favorited=0&tags=tag1'),
+                         self.ids(1, 3, 5))
+
+
+class RecipeFilterQueryCountTests(FoodgramTestCase):
+    """Число запросов фильтрованного списка не зависит от объема данных."""
+
+    # Пять запросов обычного списка и поиск тегов по slug
+    QUERIES = {
+        'is_favorited=0&tags=breakfast': 6,
+        'is_favorited=1&tags=breakfast&tags=lunch': 6,
+        'is_in_shopping_cart=1&ordering=popular': 5,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        create_ingredients(30)
+
+    def generate(self, users, recipes, prefix):
+        call_command(
+            'generate_dataset', users=users, recipes=recipes, follows=3,
+            favourites=10, carts=5, prefix=prefix, stdout=io.StringIO()
+        )
+
+    def assert_query_counts(self, user):
+        self.client.force_authenticate(user)
+        for query, expected in self.QUERIES.items():
+            with self.subTest(query=query), self.assertNumQueries(expected):
+                response = self.client.get(f'/api/recipes/?{query}')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.data['results'])
+
+    def test_queries_do_not_grow_with_dataset(self):
+        self.generate(5, 20, 'small-')
+        user = User.objects.get(username='small-0')
+        self.assert_query_counts(user)
+        self.generate(50, 500, 'large-')
+        self.assertGreater(Recipes.objects.count(), 500)
+        self.assert_query_counts(user)
+
+
+@skipUnless(
+    os.getenv('FOODGRAM_BENCHMARK'),
+    'Долгий замер: включается переменной окружения FOODGRAM_BENCHMARK=1'
+)
+class RecipeFilterBenchmark(FoodgramTestCase):
+    """Время фильтров ленты на 100 000 рецептов из generate_dataset.
+
+    Запуск: FOODGRAM_BENCHMARK=1 python manage.py test
+    api.tests.test_filters.RecipeFilterBenchmark
+    """
+    RECIPES = int(os.getenv('FOODGRAM_BENCHMARK_RECIPES', 100000))
+    REPEAT = 5
+    # Медиана одного запроса к API, в секундах
+    BUDGET = 0.5
+    QUERIES = (
+        'tags=breakfast',
+        'tags=breakfast&tags=dinner',
+        'is_favorited=1',
+        'is_favorited=0&tags=lunch',
+        'is_in_shopping_cart=1',
+        'is_favorited=1&tags=breakfast',
+        'ordering=popular&tags=dinner',
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        create_ingredients(2000)
+        call_command(
+            'generate_dataset', users=max(cls.RECIPES // 100, 10),
+            recipes=cls.RECIPES, stdout=io.StringIO()
+        )
+        cls.user = User.objects.get(username='user0')
+
+    def test_filters(self):
+        self.client.force_authenticate(self.user)
+        for query in self.QUERIES:
+            url = f'/api/recipes/?{query}'
+            self.client.get(url)
+            timings = []
+            for _ in range(self.REPEAT):
+                started = time.perf_counter()
+                response = self.client.get(url)
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            sys.stderr.write(
+                f'\n{query:<55} {median * 1000:8.1f} мс, '
+                f'рецептов: {response.data["count"]}'
+            )
+            with self.subTest(query=query):
+                self.assertLess(median, self.BUDGET)
@@ -0,0 +1,84 @@
+import re
+
+from api.middleware import QueryInstrumentationMiddleware
+from api.tests.base import FoodgramTestCase, create_tags
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from recipes.models import Tags
+
+OPTIONS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_MS': 10 ** 6,
+    'SLOW_QUERY_MS': 10 ** 6,
+    'DUPLICATE_QUERY_THRESHOLD': 3,
+}
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", app;dur=-?[\d.]+, '
+    r'total;dur=[\d.]+'
+)
+
+
+def repeat_queries(request):
+    for _ in range(3):
+        list(Tags.objects.all())
+    return HttpResponse()
+
+
+class QueryInstrumentationMiddlewareTests(FoodgramTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_tags(2)
+
+    def call(self, **options):
+        with override_settings(QUERY_INSTRUMENTATION={**OPTIONS, **options}):
+            middleware = QueryInstrumentationMiddleware(repeat_queries)
+        return middleware(RequestFactory().get('/api/tags/'))
+
+    @override_settings(QUERY_INSTRUMENTATION=OPTIONS)
+    def test_server_timing_header(self):
+        response = self.client.get('/api/tags/')
+        match = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        self.assertEqual(int(match.group(1)), 1)
+
+    def test_runs_before_other_middleware(self):
+        self.assertEqual(
+            settings.MIDDLEWARE[0],
+            'api.middleware.QueryInstrumentationMiddleware'
+        )
+
+    def test_server_timing_can_be_disabled(self):
+        response = self.call(SERVER_TIMING=False)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_duplicate_sql_is_logged(self):
+        with self.assertLogs('api.middleware', 'WARNING') as logs:
+            self.call()
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('Повторяющийся SQL в /api/tags/: 3 раз',
+                      logs.output[0])
+
+    def test_slow_request_and_sql_are_logged(self):
+        with self.assertLogs('api.middleware', 'WARNING') as logs:
+            self.call(SLOW_REQUEST_MS=0, SLOW_QUERY_MS=0,
+                      DUPLICATE_QUERY_THRESHOLD=10)
+        messages = [record.getMessage() for record in logs.records]
+        self.assertTrue(messages[0].startswith(
+            'Медленный запрос GET /api/tags/ (/api/tags/)'
+        ))
+        self.assertIn('SQL: 3 запросов', messages[0])
+        self.assertEqual(
+            sum(message.startswith('Медленный SQL') for message in messages),
+            3
+        )
+
+    def test_disabled_middleware_is_not_used(self):
+        with override_settings(
+            QUERY_INSTRUMENTATION={**OPTIONS, 'ENABLED': False}
+        ):
+            with self.assertRaises(MiddlewareNotUsed):
+                QueryInstrumentationMiddleware(repeat_queries)
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from api.pagination import RecipeCursorPagination
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Recipes
+
+
+class RecipeCursorPaginationTests(FoodgramTestCase):
+    """Курсорная лента обходится без COUNT(*), пропусков и повторов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_users(1)[0]
+        cls.tags = create_tags(1)
+        cls.ingredients = create_ingredients(3)
+        create_recipes([cls.author], 14, cls.tags, cls.ingredients)
+        # Одинаковое время публикации проверяет порядок по id
+        Recipes.objects.filter(
+            id__in=Recipes.objects.order_by('id').values('id')[:4]
+        ).update(pub_date=Recipes.objects.order_by('id').first().pub_date)
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(RecipeCursorPagination, 'page_size', 4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def walk(self, url):
+        ids, urls = [], []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any(
+                'COUNT(' in query['sql'] for query in queries.captured_queries
+            ))
+            self.assertNotIn('count', response.data)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            urls.append(url)
+            url = response.data['next']
+        return ids, urls
+
+    def test_walks_all_recipes_in_feed_order(self):
+        ids, urls = self.walk('/api/recipes/?pagination=cursor')
+        self.assertEqual(len(urls), 4)
+        self.assertEqual(ids, list(
+            Recipes.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        ))
+
+    def test_next_links_are_stable(self):
+        first = self.client.get('/api/recipes/?pagination=cursor')
+        expected = self.client.get(first.data['next']).data['results']
+        # Новый рецепт появляется в начале ленты и не сдвигает страницы
+        create_recipes([self.author], 1, self.tags, self.ingredients)
+        again = self.client.get(first.data['next']).data['results']
+        self.assertEqual(again, expected)
+
+    def test_ordering_is_rejected(self):
+        response = self.client.get(
+            '/api/recipes/?pagination=cursor&ordering=popular'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
@@ -0,0 +1,66 @@
+from api.scenario import make_image
+from api.tests.base import FoodgramTestCase, create_ingredients, create_tags
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Ingredients, Tags
+from recipes.serializers import RecipeAddUpdateSerializer
+
+
+class RecipeRelationsValidationTests(FoodgramTestCase):
+    """id тегов и ингредиентов проверяются разом, ошибки — все сразу."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = create_tags(2)
+        cls.ingredients = create_ingredients(3)
+
+    def validate(self, tags, ingredients):
+        serializer = RecipeAddUpdateSerializer(data={
+            'ingredients': [
+                {'id': pk, 'amount': 5} for pk in ingredients
+            ],
+            'tags': tags,
+            'image': make_image(),
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+        })
+        with CaptureQueriesContext(connection) as queries:
+            serializer.is_valid()
+        tables = [
+            model._meta.db_table
+            for query in queries.captured_queries
+            for model in (Tags, Ingredients)
+            if f'FROM "{model._meta.db_table}"' in query['sql']
+        ]
+        return serializer, tables
+
+    def test_one_query_per_model(self):
+        ids = [ingredient.id for ingredient in self.ingredients]
+        serializer, tables = self.validate(
+            [tag.id for tag in self.tags], ids
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(sorted(tables), [
+            Ingredients._meta.db_table, Tags._meta.db_table
+        ])
+        self.assertEqual(
+            [item['ingredients'].id
+             for item in serializer.validated_data['ingredients']],
+            ids
+        )
+
+    def test_all_errors_are_reported_together(self):
+        first, second, _ = (ingredient.id for ingredient in self.ingredients)
+        serializer, tables = self.validate(
+            [self.tags[0].id, 998, 999],
+            [first, first, second, second, 1001, 1000]
+        )
+        self.assertEqual(len(tables), 2)
+        self.assertEqual(serializer.errors['tags'], [
+            'Не найдены объекты с id: 998, 999'
+        ])
+        self.assertEqual(serializer.errors['ingredients'], [
+            f'Ингредиенты повторяются: {first}, {second}',
+            'Не найдены объекты с id: 1000, 1001',
+        ])
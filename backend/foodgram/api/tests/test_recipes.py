@@ -0,0 +1,51 @@
+from unittest import mock
+
+from api.pagination import RecipePagination
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+
+
+class RecipeQueryCountTests(FoodgramTestCase):
+    """Список и карточка рецепта читаются за постоянное число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users(4)
+        cls.tags = create_tags(3)
+        cls.ingredients = create_ingredients(12)
+        cls.recipes = create_recipes(
+            cls.users, 12, cls.tags, cls.ingredients, per_recipe=3
+        )
+        cls.big_recipe = create_recipes(
+            cls.users[:1], 1, cls.tags, cls.ingredients, per_recipe=12
+        )[0]
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.client.force_authenticate(self.users[0])
+        for page_size in (2, 12):
+            with self.subTest(page_size=page_size), mock.patch.object(
+                RecipePagination, 'page_size', page_size
+            ):
+                # COUNT, рецепты, теги, ингредиенты, подписки пользователя
+                with self.assertNumQueries(5):
+                    response = self.client.get('/api/recipes/')
+                self.assertEqual(len(response.data['results']), page_size)
+
+    def test_anonymous_list_queries_do_not_grow_with_page_size(self):
+        for page_size in (2, 12):
+            with self.subTest(page_size=page_size), mock.patch.object(
+                RecipePagination, 'page_size', page_size
+            ):
+                with self.assertNumQueries(4):
+                    self.client.get('/api/recipes/')
+
+    def test_retrieve_queries_do_not_grow_with_ingredients(self):
+        self.client.force_authenticate(self.users[0])
+        for recipe in (self.recipes[0], self.big_recipe):
+            with self.subTest(recipe=recipe.id):
+                with self.assertNumQueries(4):
+                    response = self.client.get(f'/api/recipes/{recipe.id}/')
+                self.assertEqual(
+                    len(response.data['ingredients']),
+                    recipe.ingredients_recipe.count()
+                )
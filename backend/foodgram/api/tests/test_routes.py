@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import tempfile
+
+from api.scenario import get_api_routes, make_dataset, run_cases
+from api.tests.base import FoodgramTestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+class ApiRoutesQueryCountTests(FoodgramTestCase):
+    """Каждый маршрут api/urls.py укладывается в свое число SQL-запросов.
+
+    Сценарий из api.scenario прогоняется на данных нескольких размеров,
+    и предел один для всех: число запросов не должно расти вместе
+    с данными.
+    """
+    SIZES = (1, 8)
+    MAX_QUERIES = {
+        'api-root': 0,
+        'users-list': 3,
+        'users-detail': 2,
+        'users-me': 1,
+        'subscriptions': 3,
+        'subscribe': 8,
+        'unsubscribe': 1,
+        'tags-list': 1,
+        'tags-detail': 1,
+        'ingredients-list': 1,
+        'ingredients-search': 1,
+        'ingredients-detail': 1,
+        'recipes-list': 5,
+        'recipes-filtered': 6,
+        'recipes-cursor': 4,
+        'recipes-detail': 4,
+        'recipes-create': 11,
+        'recipes-update': 11,
+        'favorite': 8,
+        'unfavorite': 4,
+        'cart-add': 8,
+        'cart-remove': 4,
+        'download-pdf': 1,
+        'download-txt': 1,
+        'download-csv': 1,
+        'shopping-job-create': 2,
+        'shopping-job': 0,
+        'shopping-job-result': 0,
+        'recipes-delete': 9,
+        'set-password': 2,
+    }
+
+    def call(self, case):
+        self.covered.add(resolve(case.url.split('?')[0]).route)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, case.method)(
+                case.url, case.data, format='json'
+            )
+        self.assertEqual(response.status_code, case.status, case.name)
+        self.assertLessEqual(
+            len(queries), self.MAX_QUERIES[case.name],
+            f'{case.name}: слишком много запросов\n' + '\n'.join(
+                query['sql'] for query in queries.captured_queries
+            )
+        )
+        self.counts[case.name] = len(queries)
+        if case.name == 'recipes-filtered':
+            # Пустая страница пропустила бы запросы предзагрузки
+            self.assertTrue(response.data['results'])
+        return response
+
+    def test_query_counts(self):
+        self.covered = set()
+        counts = {}
+        for size in self.SIZES:
+            # Каждый размер проверяется на своих данных, затем откатывается
+            self.counts = counts[size] = {}
+            cache.clear()
+            with transaction.atomic():
+                context = make_dataset(size)
+                self.client.force_authenticate(context['actor'])
+                run_cases(context, self.call)
+                transaction.set_rollback(True)
+        self.assertEqual(self.covered, get_api_routes())
+        self.assertEqual(counts[self.SIZES[0]].keys(), self.MAX_QUERIES.keys())
+        smallest, *others = self.SIZES
+        for size in others:
+            self.assertEqual(counts[size], counts[smallest])
+
+
+class ProfileApiCommandTests(FoodgramTestCase):
+    """Команда profile_api проходит на том же сценарии."""
+
+    def test_update_and_compare(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        baseline = os.path.join(directory.name, 'baseline.json')
+        options = {
+            'sizes': [1, 3], 'repeat': 1, 'baseline': baseline,
+            'max_slowdown': 100, 'stdout': io.StringIO(),
+        }
+        call_command('profile_api', update=True, **options)
+        with open(baseline) as file:
+            results = json.load(file)
+        self.assertEqual(
+            results['recipes-filtered']['1']['queries'],
+            results['recipes-filtered']['3']['queries']
+        )
+        call_command('profile_api', **options)
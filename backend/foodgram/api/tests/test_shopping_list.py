@@ -0,0 +1,130 @@
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from django.core.files.storage import default_storage
+from recipes.models import Shoplist
+
+DOWNLOAD_URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListDownloadTests(FoodgramTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = create_users(2)
+        cls.recipes = create_recipes(
+            [cls.author], 3, create_tags(1), create_ingredients(5)
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def add_to_cart(self):
+        Shoplist.objects.bulk_create(
+            Shoplist(user=self.user, recipe=recipe) for recipe in self.recipes
+        )
+
+    def test_empty_list_returns_message(self):
+        response = self.client.get(DOWNLOAD_URL, {'format': 'txt'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), 'В списке покупок нет данных!')
+
+    def test_document_is_streamed_and_then_cached(self):
+        self.add_to_cart()
+        with self.assertNumQueries(1):
+            response = self.client.get(DOWNLOAD_URL, {'format': 'txt'})
+            self.assertTrue(response.streaming)
+            content = b''.join(response.streaming_content).decode()
+        self.assertIn('Ингредиент 0: 1 г', content)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="shopping_list.txt"'
+        )
+        with self.assertNumQueries(0):
+            cached = self.client.get(DOWNLOAD_URL, {'format': 'txt'})
+            self.assertEqual(
+                b''.join(cached.streaming_content).decode(), content
+            )
+
+    def test_etag_gives_not_modified(self):
+        self.add_to_cart()
+        response = self.client.get(DOWNLOAD_URL, {'format': 'csv'})
+        b''.join(response.streaming_content)
+        response = self.client.get(
+            DOWNLOAD_URL, {'format': 'csv'},
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_pdf_is_default_format(self):
+        self.add_to_cart()
+        response = self.client.get(DOWNLOAD_URL)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(
+            b''.join(response.streaming_content).startswith(b'%PDF')
+        )
+
+
+class ShoppingListJobTests(FoodgramTestCase):
+    jobs_url = '/api/recipes/download_shopping_cart/jobs/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = create_users(2)
+        cls.recipes = create_recipes(
+            [cls.author], 2, create_tags(1), create_ingredients(4)
+        )
+        Shoplist.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def start_job(self, export_format='txt'):
+        response = self.client.post(self.jobs_url, {'format': export_format})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'done')
+        return response.data['id']
+
+    def get_result(self, job_id):
+        return self.client.get(f'{self.jobs_url}{job_id}/result/')
+
+    def stored_files(self, export_format='txt'):
+        _, files = default_storage.listdir(f'shopping_lists/{self.user.pk}')
+        return [name for name in files if name.endswith(f'.{export_format}')]
+
+    def test_invalid_body_is_rejected(self):
+        self.start_job()
+        files = self.stored_files()
+        for data in ([1], {'format': 'xml'}, {'format': ['txt']}):
+            with self.subTest(data=data):
+                response = self.client.post(
+                    self.jobs_url, data, format='json'
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored_files(), files)
+
+    def test_default_format(self):
+        response = self.client.post(self.jobs_url, {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['format'], 'pdf')
+
+    def test_repeated_jobs_reuse_one_file(self):
+        first = self.get_result(self.start_job())
+        second = self.get_result(self.start_job())
+        self.assertEqual(
+            b''.join(first.streaming_content),
+            b''.join(second.streaming_content)
+        )
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_cart_change_replaces_file(self):
+        old_job = self.start_job()
+        response = self.client.post(
+            f'/api/recipes/{self.recipes[1].id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 201)
+        new_job = self.start_job()
+        self.assertEqual(len(self.stored_files()), 1)
+        self.assertEqual(self.get_result(old_job).status_code, 404)
+        self.assertEqual(self.get_result(new_job).status_code, 200)
@@ -0,0 +1,50 @@
+from unittest import mock
+
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from recipes.models import Follow
+from rest_framework.pagination import PageNumberPagination
+
+
+class SubscriptionsTests(FoodgramTestCase):
+    """Страница подписок читается за постоянное число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1)[0]
+        # Подписки создаются не в порядке id авторов
+        cls.authors = create_users(8, start=1)[::-1]
+        create_recipes(cls.authors, 40, create_tags(1), create_ingredients(3))
+        Follow.objects.bulk_create(
+            Follow(user=cls.user, author=author) for author in cls.authors
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def get_page(self, page_size, limit):
+        with mock.patch.object(PageNumberPagination, 'page_size', page_size):
+            # COUNT, авторы с числом рецептов, превью рецептов
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    f'/api/users/subscriptions/?recipes_limit={limit}'
+                )
+        return response.data['results']
+
+    def test_queries_do_not_grow_with_page_size_and_limit(self):
+        for page_size in (2, 8):
+            for limit in (1, 5):
+                with self.subTest(page_size=page_size, limit=limit):
+                    results = self.get_page(page_size, limit)
+                    self.assertEqual(len(results), page_size)
+                    for author in results:
+                        self.assertEqual(author['recipes_count'], 5)
+                        self.assertEqual(len(author['recipes']), limit)
+                        self.assertTrue(author['is_subscribed'])
+
+    def test_ordered_by_subscription_time(self):
+        self.assertEqual(
+            [author['id'] for author in self.get_page(8, 1)],
+            [author.id for author in self.authors]
+        )
@@ -0,0 +1,51 @@
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from recipes.models import Favourites, Follow, Shoplist
+
+
+class UniqueCreateTests(FoodgramTestCase):
+    """Повторное добавление отсекает ограничение БД, а не лишний SELECT."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = create_users(2)
+        cls.recipe = create_recipes(
+            [cls.author], 1, create_tags(1), create_ingredients(3)
+        )[0]
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def assert_duplicate_rejected(self, url, message):
+        self.assertEqual(self.client.post(url).status_code, 201)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'non_field_errors': [message]})
+
+    def test_duplicate_favourite(self):
+        self.assert_duplicate_rejected(
+            f'/api/recipes/{self.recipe.id}/favorite/',
+            'Вы уже добавили рецепт с список избранного'
+        )
+        self.assertEqual(Favourites.objects.count(), 1)
+        # Счетчик увеличивается в той же транзакции и откатывается с ней
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_duplicate_shopping_cart(self):
+        self.assert_duplicate_rejected(
+            f'/api/recipes/{self.recipe.id}/shopping_cart/',
+            'Вы уже добавили рецепт в список покупок'
+        )
+        self.assertEqual(Shoplist.objects.count(), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.in_carts_count, 1)
+
+    def test_duplicate_follow(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data)
+        self.assertEqual(Follow.objects.count(), 1)
@@ -1,7 +1,7 @@
 from django.urls import include, path
 from recipes.views import (FavouriteViewSet, IngredientsViewSet,
-                           RecipesViewSet, ShopListDownload, ShoplistViewSet,
-                           TagViewSet)
+                           RecipesViewSet, ShopListDownload,
+                           ShopListJobViewSet, ShoplistViewSet, TagViewSet)
 from rest_framework.routers import DefaultRouter
 from users.views import FollowAddViewSet, FollowListViewSet, UserViewSet
 
@@ -16,6 +16,15 @@ router.register(r'ingredients', IngredientsViewSet, basename='ingredients')
 
 urlpatterns = [
     path('recipes/download_shopping_cart/', ShopListDownload.as_view()),
+    path('recipes/download_shopping_cart/jobs/', ShopListJobViewSet.as_view(
+        {'post': 'create'}
+    )),
+    path('recipes/download_shopping_cart/jobs/<job_id>/',
+         ShopListJobViewSet.as_view({'get': 'retrieve'}),
+         name='shopping-list-job'),
+    path('recipes/download_shopping_cart/jobs/<job_id>/result/',
+         ShopListJobViewSet.as_view({'get': 'result'}),
+         name='shopping-list-job-result'),
     path('', include(router.urls)),
     path('users/<id>/subscribe/', FollowAddViewSet.as_view(
         {'post': 'create', 'delete': 'destroy'}
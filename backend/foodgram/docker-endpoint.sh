@@ -1,6 +1,12 @@
 #!/bin/bash
 python manage.py makemigrations
 python manage.py migrate
-python manage.py loaddata -i dump.json
+python manage.py load_ingredients dump.json
+# Демонстрационные данные загружаются только в пустую базу: повторная
+# загрузка затирала бы их изменения и счетчики рецептов
+if python manage.py shell -c "import sys; from recipes.models import Recipes; sys.exit(Recipes.objects.exists())"; then
+    python manage.py loaddata -i -e recipes.ingredients dump.json
+    python manage.py rebuild_recipe_counters
+fi
 python manage.py collectstatic --noinput
 gunicorn foodgram.wsgi:application --bind 0:8000
\ No newline at end of file
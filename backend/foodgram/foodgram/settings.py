@@ -16,7 +16,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('SECRET_KEY', default='anytext')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv('DEBUG', default='False')
+DEBUG = os.getenv('DEBUG', default='False').lower() in ('true', '1', 'yes')
 
 ALLOWED_HOSTS = ['84.201.165.95', 'pagapov.ru', '127.0.0.1', 'localhost', 'web']
 
@@ -41,6 +41,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы учитывать время и запросы всех остальных middleware
+    'api.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -84,6 +86,69 @@ DATABASES = {
     }
 }
 
+# Кеш: в памяти процесса по умолчанию, общий бэкенд задается через окружение
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+# Время хранения готовых списков покупок в кеше, в секундах
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Фоновые задачи: по умолчанию пул потоков внутри процесса. Состояние задач
+# хранится в кеше, поэтому при нескольких процессах нужен общий кеш.
+JOB_RUNNER = {
+    'BACKEND': os.getenv('JOB_RUNNER', default='recipes.jobs.ThreadPoolJobRunner'),
+    'OPTIONS': {
+        'max_workers': int(os.getenv('JOB_RUNNER_WORKERS', default='2')),
+    },
+}
+SHOPPING_LIST_JOB_TIMEOUT = 60 * 60 * 24
+
+# Сколько ингредиентов отдавать в подсказках при поиске по названию
+INGREDIENT_SEARCH_LIMIT = 20
+INGREDIENT_SEARCH_MAX_LIMIT = 100
+
+# Замеры SQL и времени ответа (заголовок Server-Timing и журнал).
+# Выключены по умолчанию; пороги в миллисекундах, повтор — одинаковый
+# SQL не меньше DUPLICATE_QUERY_THRESHOLD раз за запрос
+QUERY_INSTRUMENTATION = {
+    'ENABLED': os.getenv(
+        'QUERY_INSTRUMENTATION', default='False'
+    ).lower() in ('true', '1', 'yes'),
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_MS': int(os.getenv('SLOW_REQUEST_MS', default='500')),
+    'SLOW_QUERY_MS': int(os.getenv('SLOW_QUERY_MS', default='100')),
+    'DUPLICATE_QUERY_THRESHOLD': 3,
+}
+
+# Псевдоним кеша для пользователей, найденных по токену. Кеш должен быть
+# общим для всех процессов (Redis, Memcached): выход и смена пароля
+# сбрасывают запись, и это должны увидеть все воркеры. Локальный
+# LocMemCache для этого не подходит, поэтому по умолчанию кеш выключен.
+AUTH_TOKEN_CACHE = os.getenv('AUTH_TOKEN_CACHE', default='') or None
+# Сколько секунд пользователь, найденный по токену, хранится в кеше
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# Кеш справочников (теги, ингредиенты): время хранения на сервере
+# и сколько секунд клиент может не перепроверять ответ
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+REFERENCE_CACHE_MAX_AGE = 60
+
+# Обработка изображений рецептов: предельный размер оригинала, формат
+# и качество сжатия, размеры миниатюр для полей модели Recipes
+RECIPE_IMAGES = {
+    'MAX_SIZE': (1600, 1600),
+    'FORMAT': os.getenv('RECIPE_IMAGE_FORMAT', default='JPEG'),
+    'QUALITY': 85,
+    'THUMBNAILS': {
+        'thumbnail_list': (400, 400),
+        'thumbnail_card': (800, 800),
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -149,7 +214,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
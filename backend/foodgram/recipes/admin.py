@@ -6,7 +6,8 @@ from .models import (Favourites, Follow, Ingredients, RecipeIngredient,
 
 class RecipesAdmin(admin.ModelAdmin):
     list_display = (
-        'name', 'author', 'text', 'cooking_time', 'pub_date'
+        'name', 'author', 'text', 'cooking_time', 'pub_date',
+        'favorites_count'
     )
     search_fields = ('text',)
     list_filter = ('pub_date',)
@@ -0,0 +1,114 @@
+import csv
+import tempfile
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'DejaVuSans'
+FONT_FILE = 'DejaVuSans.ttf'
+
+MARGIN_LEFT = 20
+TITLE_Y = 800
+FIRST_LINE_Y = 750
+LAST_LINE_Y = 70
+LINE_HEIGHT = 20
+
+CHUNK_SIZE = 64 * 1024
+
+
+def register_fonts():
+    """Регистрирует шрифт для PDF один раз за время жизни процесса."""
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(FONT_NAME, str(settings.BASE_DIR / FONT_FILE))
+        )
+
+
+def format_item(item):
+    return (f"{item['ingredients__name']}: {item['total_amount']}"
+            f" {item['ingredients__measurement_unit']}")
+
+
+class Echo:
+    """Псевдофайл, который возвращает записанную строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def export_txt(shopping_list):
+    """Построчно отдает список покупок в виде простого текста."""
+    yield 'Для ваших рецептов нужно купить:\n'
+    for item in shopping_list:
+        yield f'{format_item(item)}\n'
+
+
+def export_csv(shopping_list):
+    """Построчно отдает список покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Количество', 'Единица измерения'))
+    for item in shopping_list:
+        yield writer.writerow((
+            item['ingredients__name'],
+            item['total_amount'],
+            item['ingredients__measurement_unit'],
+        ))
+
+
+EXPORTERS = {
+    'txt': export_txt,
+    'csv': export_csv,
+}
+EXPORT_FORMATS = ('pdf', *EXPORTERS)
+
+
+def _draw_footer(pdf):
+    pdf.setFont(FONT_NAME, 10)
+    pdf.drawString(MARGIN_LEFT, 40, 'Foodgram by Pavel Agapov, 2022')
+    pdf.drawString(MARGIN_LEFT, 25, 'All rights reserved')
+
+
+def write_pdf(shopping_list, output):
+    """Рисует список покупок в PDF, перенося строки на новые страницы."""
+    register_fonts()
+    pdf = canvas.Canvas(output, pagesize=A4)
+    pdf.setFont(FONT_NAME, 20)
+    pdf.drawString(MARGIN_LEFT, TITLE_Y, 'Для ваших рецептов нужно купить:')
+    pdf.setFont(FONT_NAME, 14)
+    y = FIRST_LINE_Y
+    for item in shopping_list:
+        if y < LAST_LINE_Y:
+            _draw_footer(pdf)
+            pdf.showPage()
+            pdf.setFont(FONT_NAME, 14)
+            y = TITLE_Y
+        pdf.drawString(MARGIN_LEFT, y, format_item(item))
+        y -= LINE_HEIGHT
+    _draw_footer(pdf)
+    pdf.showPage()
+    pdf.save()
+
+
+def export_pdf(shopping_list):
+    """Возвращает временный файл с PDF, готовый к потоковой отдаче."""
+    output = tempfile.TemporaryFile()
+    write_pdf(shopping_list, output)
+    output.seek(0)
+    return output
+
+
+def stream_document(shopping_list, export_format):
+    """Отдает документ частями в байтах, по мере формирования.
+
+    TXT и CSV идут построчно; PDF сначала целиком пишется во временный
+    файл, а затем читается из него блоками.
+    """
+    if export_format == 'pdf':
+        with export_pdf(shopping_list) as output:
+            yield from iter(lambda: output.read(CHUNK_SIZE), b'')
+        return
+    for line in EXPORTERS[export_format](shopping_list):
+        yield line.encode()
@@ -0,0 +1,102 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps
+from recipes.models import Recipes
+
+EXTENSIONS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+}
+
+
+def encode_image(image, size):
+    """Уменьшает изображение до size и сохраняет в заданном формате."""
+    options = settings.RECIPE_IMAGES
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(size, Image.LANCZOS)
+    if options['FORMAT'] == 'JPEG' and image.mode != 'RGB':
+        # В JPEG нет прозрачности, поэтому подкладываем белый фон
+        background = Image.new('RGB', image.size, 'white')
+        image = image.convert('RGBA')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = io.BytesIO()
+    image.save(
+        buffer,
+        format=options['FORMAT'],
+        quality=options['QUALITY'],
+        optimize=True
+    )
+    return buffer.getvalue()
+
+
+def process_image(recipe):
+    """Пережимает загруженное изображение рецепта и создает миниатюры.
+
+    Все версии строятся из исходного файла. Рецепт обновляется, только
+    если его изображение не сменилось, пока шла обработка; иначе
+    созданные файлы удаляются, а новой загрузкой займется своя задача.
+    """
+    options = settings.RECIPE_IMAGES
+    original = recipe.image.name
+    stem = os.path.splitext(os.path.basename(original))[0]
+    extension = EXTENSIONS[options['FORMAT']]
+    sizes = {'image': options['MAX_SIZE'], **options['THUMBNAILS']}
+    with recipe.image.open('rb') as file, Image.open(file) as image:
+        image.load()
+        for field, size in sizes.items():
+            suffix = '' if field == 'image' else f'_{size[0]}'
+            getattr(recipe, field).save(
+                f'{stem}{suffix}.{extension}',
+                ContentFile(encode_image(image.copy(), size)),
+                save=False
+            )
+    names = {field: getattr(recipe, field).name for field in sizes}
+    updated = Recipes.objects.filter(
+        pk=recipe.pk, image=original
+    ).update(**names)
+    if updated:
+        delete_unused_files({original} - {names['image']})
+    else:
+        delete_unused_files(names.values())
+
+
+def process_recipe_image(recipe_id):
+    """Фоновая задача: обрабатывает только что загруженное изображение."""
+    recipe = Recipes.objects.filter(pk=recipe_id).first()
+    if recipe is not None and recipe.image:
+        process_image(recipe)
+
+
+def recipe_files(recipe):
+    """Имена файлов изображения и миниатюр рецепта."""
+    files = (recipe.image, recipe.thumbnail_list, recipe.thumbnail_card)
+    return {file.name for file in files if file}
+
+
+def delete_unused_files(names):
+    """Удаляет файлы, на которые больше не ссылается ни один рецепт.
+
+    Одинаковые изображения хранятся в одном файле, поэтому перед удалением
+    проверяется, что файл не нужен другим рецептам. Недавно сохраненные
+    файлы остаются до очистки командой dedupe_recipe_images.
+    """
+    names = set(filter(None, names))
+    if not names:
+        return
+    used = Recipes.objects.filter(
+        Q(image__in=names)
+        | Q(thumbnail_list__in=names)
+        | Q(thumbnail_card__in=names)
+    ).values_list('image', 'thumbnail_list', 'thumbnail_card')
+    for row in used:
+        names.difference_update(row)
+    storage = Recipes._meta.get_field('image').storage
+    for name in names:
+        storage.discard(name)
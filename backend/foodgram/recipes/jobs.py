@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+
+class BaseJobRunner:
+    """Интерфейс исполнителя фоновых задач.
+
+    Бэкенд очереди должен реализовать submit(): принять импортируемую
+    функцию с простыми аргументами и выполнить ее вне потока запроса.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+
+    def submit(self, func, *args, **kwargs):
+        raise NotImplementedError
+
+
+class ThreadPoolJobRunner(BaseJobRunner):
+    """Выполняет задачи в пуле потоков текущего процесса."""
+
+    def __init__(self, max_workers=None, **options):
+        super().__init__(**options)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='foodgram-job'
+        )
+
+    def submit(self, func, *args, **kwargs):
+        self.executor.submit(self.run, func, *args, **kwargs)
+
+    @staticmethod
+    def run(func, *args, **kwargs):
+        # У каждого потока свое соединение с БД, закрываем его после задачи
+        try:
+            func(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+
+class ImmediateJobRunner(BaseJobRunner):
+    """Выполняет задачу сразу, в текущем потоке. Удобен для отладки."""
+
+    def submit(self, func, *args, **kwargs):
+        func(*args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_job_runner():
+    runner_class = import_string(settings.JOB_RUNNER['BACKEND'])
+    return runner_class(**settings.JOB_RUNNER.get('OPTIONS', {}))
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from recipes.models import Recipes
+
+FIELDS = ('image', 'thumbnail_list', 'thumbnail_card')
+
+
+class Command(BaseCommand):
+    help = ('Переименовывает изображения рецептов по хешу содержимого, '
+            'объединяет одинаковые файлы и удаляет неиспользуемые')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет сделано'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = Recipes._meta.get_field('image').storage
+        renamed = self.rename_files(storage, dry_run)
+        orphans = self.find_orphans(storage)
+        if dry_run:
+            deleted = len(orphans)
+        else:
+            # Недавно сохраненные файлы может ждать еще не закоммиченный
+            # рецепт, их удалит один из следующих запусков
+            deleted = sum(storage.discard(name) for name in orphans)
+        prefix = 'Будет ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}переименовано файлов: {renamed}, '
+            f'удалено неиспользуемых: {deleted}'
+        ))
+
+    def rename_files(self, storage, dry_run):
+        """Сохраняет файлы рецептов под именами из хеша содержимого."""
+        renamed = 0
+        changed = []
+        for recipe in Recipes.objects.only('id', *FIELDS).iterator():
+            dirty = False
+            for field in FIELDS:
+                file = getattr(recipe, field)
+                if not file or not storage.exists(file.name):
+                    continue
+                with storage.open(file.name) as content:
+                    name = storage.hashed_name(file.name, content)
+                    if name == file.name:
+                        continue
+                    if not dry_run:
+                        name = storage.save(file.name, content)
+                setattr(recipe, field, name)
+                renamed += 1
+                dirty = True
+            if dirty:
+                changed.append(recipe)
+        if not dry_run:
+            Recipes.objects.bulk_update(changed, FIELDS, batch_size=500)
+        return renamed
+
+    def find_orphans(self, storage):
+        """Ищет в каталогах изображений файлы без ссылок из рецептов."""
+        used = set()
+        for row in Recipes.objects.values_list(*FIELDS):
+            used.update(row)
+        directories = {
+            Recipes._meta.get_field(field).upload_to.rstrip('/')
+            for field in FIELDS
+        }
+        orphans = []
+        for directory in sorted(directories):
+            if not storage.exists(directory):
+                continue
+            for filename in storage.listdir(directory)[1]:
+                name = f'{directory}/{filename}' if directory else filename
+                if name not in used:
+                    orphans.append(name)
+        return orphans
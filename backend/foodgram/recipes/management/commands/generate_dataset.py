@@ -0,0 +1,252 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from recipes.images import encode_image
+from recipes.models import (Favourites, Follow, Ingredients, RecipeIngredient,
+                            Recipes, RecipeTag, Shoplist, Tags)
+from users.models import User
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500)
+
+
+def zipf_weights(size, exponent=1.0):
+    """Накопленные веса, при которых первые элементы встречаются чаще."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+def weighted_sample(rng, population, cum_weights, k):
+    """Выбирает k разных элементов с учетом весов."""
+    k = min(k, len(population))
+    chosen = set()
+    while len(chosen) < k:
+        chosen.update(rng.choices(
+            population, cum_weights=cum_weights, k=k - len(chosen)
+        ))
+    return chosen
+
+
+def batched(objects, size):
+    iterator = iter(objects)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ('Создает синтетические данные для нагрузочной проверки: '
+            'пользователей, рецепты, подписки, избранное и списки покупок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--ingredients', type=int, nargs=2, default=(3, 12),
+            metavar=('MIN', 'MAX'),
+            help='Сколько ингредиентов бывает в рецепте'
+        )
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Подписок на пользователя'
+        )
+        parser.add_argument(
+            '--favourites', type=int, default=20,
+            help='Рецептов в избранном у пользователя'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Рецептов в списке покупок у пользователя'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикации рецептов'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix', default='user',
+            help='Префикс имен создаваемых пользователей'
+        )
+        parser.add_argument(
+            '--password', default='password',
+            help='Пароль всех создаваемых пользователей'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.total = 0
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Пользователи с префиксом «{prefix}» уже есть, '
+                'укажите другой --prefix'
+            )
+        ingredient_ids = list(
+            Ingredients.objects.order_by('id').values_list('id', flat=True)
+        )
+        if not ingredient_ids:
+            raise CommandError(
+                'Нет ингредиентов: сначала выполните load_ingredients'
+            )
+        started = time.monotonic()
+        with transaction.atomic():
+            tag_ids = self.get_tags()
+            user_ids = self.create_users(
+                options['users'], prefix, options['password']
+            )
+            recipe_ids = self.create_recipes(
+                options['recipes'], user_ids, self.make_image()
+            )
+            self.spread_pub_dates(recipe_ids, options['days'])
+            self.create_recipe_relations(
+                recipe_ids, tag_ids, ingredient_ids, options['ingredients']
+            )
+            self.create_user_relations(user_ids, recipe_ids, options)
+            Recipes.objects.rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано строк: {self.total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
+
+    def insert(self, model, objects):
+        """Вставляет объекты пачками и считает записанные строки."""
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+            self.total += len(batch)
+
+    def get_tags(self):
+        if not Tags.objects.exists():
+            self.insert(Tags, (
+                Tags(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            ))
+        return list(Tags.objects.order_by('id').values_list('id', flat=True))
+
+    def make_image(self):
+        """Одна картинка на все рецепты: хранилище сохранит ее один раз."""
+        image = Image.new('RGB', (600, 400), (230, 160, 90))
+        storage = Recipes._meta.get_field('image').storage
+        return storage.save(
+            'generated.jpg', ContentFile(encode_image(image, image.size))
+        )
+
+    def create_users(self, count, prefix, password):
+        password = make_password(password)
+        self.insert(User, (
+            User(
+                username=f'{prefix}{number}',
+                email=f'{prefix}{number}@example.com',
+                first_name='Имя',
+                last_name=f'Фамилия {number}',
+                password=password
+            )
+            for number in range(count)
+        ))
+        return list(User.objects.filter(
+            username__startswith=prefix
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, count, user_ids, image):
+        # Немногие активные авторы пишут большую часть рецептов
+        authors = self.rng.choices(
+            user_ids, cum_weights=zipf_weights(len(user_ids)), k=count
+        )
+        first_id = (
+            Recipes.objects.order_by('-id').values_list('id', flat=True)
+            .first() or 0
+        )
+        self.insert(Recipes, (
+            Recipes(
+                name=f'Рецепт {number}',
+                author_id=author_id,
+                image=image,
+                text=f'Описание приготовления рецепта {number}',
+                cooking_time=self.rng.randint(5, 180)
+            )
+            for number, author_id in enumerate(authors)
+        ))
+        return list(Recipes.objects.filter(
+            id__gt=first_id
+        ).order_by('id').values_list('id', flat=True))
+
+    def spread_pub_dates(self, recipe_ids, days):
+        """Разносит даты публикации: bulk_create ставит всем одно время."""
+        now = timezone.now()
+        seconds = max(days, 0) * 24 * 60 * 60
+        for batch in batched(recipe_ids, self.batch_size):
+            Recipes.objects.bulk_update([
+                Recipes(
+                    id=recipe_id,
+                    pub_date=now - timedelta(
+                        seconds=self.rng.randint(0, seconds)
+                    )
+                )
+                for recipe_id in batch
+            ], ['pub_date'])
+
+    def create_recipe_relations(self, recipe_ids, tag_ids, ingredient_ids,
+                                ingredients_range):
+        rng = self.rng
+        tag_weights = zipf_weights(len(tag_ids), 0.5)
+        # Популярность ингредиентов не должна зависеть от алфавита
+        ingredient_ids = rng.sample(ingredient_ids, len(ingredient_ids))
+        ingredient_weights = zipf_weights(len(ingredient_ids))
+        self.insert(RecipeTag, (
+            RecipeTag(recipes_id=recipe_id, tags_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in weighted_sample(
+                rng, tag_ids, tag_weights, rng.randint(1, 2)
+            )
+        ))
+        self.insert(RecipeIngredient, (
+            RecipeIngredient(
+                recipes_id=recipe_id,
+                ingredients_id=ingredient_id,
+                amount=rng.choice(AMOUNTS)
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in weighted_sample(
+                rng, ingredient_ids, ingredient_weights,
+                rng.randint(*ingredients_range)
+            )
+        ))
+
+    def create_user_relations(self, user_ids, recipe_ids, options):
+        rng = self.rng
+        # Популярные авторы и рецепты собирают больше подписок и лайков
+        author_weights = zipf_weights(len(user_ids))
+        recipe_weights = zipf_weights(len(recipe_ids), 0.8)
+        self.insert(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in weighted_sample(
+                rng, user_ids, author_weights, options['follows']
+            )
+            if author_id != user_id
+        ))
+        for model, count in ((Favourites, options['favourites']),
+                             (Shoplist, options['carts'])):
+            self.insert(model, (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in weighted_sample(
+                    rng, recipe_ids, recipe_weights, count
+                )
+            ))
@@ -0,0 +1,118 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from api.caching import bump_version
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from recipes.models import Ingredients
+
+CHUNK_SIZE = 64 * 1024
+FIXTURE_MODEL = 'recipes.ingredients'
+
+
+def read_csv(file):
+    """Строки CSV вида «название,единица»; строка заголовка пропускается."""
+    for line, row in enumerate(csv.reader(file), start=1):
+        if not row or row == ['name', 'measurement_unit']:
+            continue
+        if len(row) != 2:
+            raise CommandError(f'Строка {line}: ожидается два столбца')
+        yield None, row[0], row[1]
+
+
+def read_json(file):
+    """Потоково читает JSON-массив, не загружая файл в память целиком.
+
+    Поддерживаются как простые объекты с name и measurement_unit,
+    так и фикстуры Django (из них берутся только ингредиенты вместе с pk).
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив объектов')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный или оборванный JSON')
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        if 'model' not in item:
+            yield None, item['name'], item['measurement_unit']
+        elif item['model'] == FIXTURE_MODEL:
+            fields = item['fields']
+            yield item.get('pk'), fields['name'], fields['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = ('Загружает ингредиенты из CSV или JSON большими пачками; '
+            'уже существующие ингредиенты пропускаются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv или .json')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Сколько строк вставлять одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json')
+        started = time.monotonic()
+        before = Ingredients.objects.count()
+        with open(path, encoding='utf-8', newline='') as file:
+            total = self.load(reader(file), options['batch_size'])
+        created = Ingredients.objects.count() - before
+        if created:
+            # bulk_create не отправляет сигналы, поэтому кеш сбрасываем сами
+            bump_version(Ingredients)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {total}, добавлено: {created} '
+            f'за {elapsed:.2f} с ({total / max(elapsed, 1e-6):.0f} строк/с)'
+        ))
+
+    @transaction.atomic
+    def load(self, rows, batch_size):
+        """Вставляет строки пачками и возвращает их количество."""
+        total = 0
+        with_pk = False
+        while True:
+            batch = [
+                Ingredients(pk=pk, name=name, measurement_unit=unit)
+                for pk, name, unit in islice(rows, batch_size)
+            ]
+            if not batch:
+                break
+            Ingredients.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+            with_pk = with_pk or any(item.pk for item in batch)
+        if with_pk:
+            # Как и loaddata, сдвигаем последовательность за явные pk
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Ingredients]
+                ):
+                    cursor.execute(sql)
+        return total
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from recipes.models import Recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики избранного и списков покупок у рецептов'
+
+    def handle(self, *args, **options):
+        updated = Recipes.objects.rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счетчики пересчитаны у {updated} рецептов'
+        ))
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:13
+
+from django.db import migrations
+from django.db.models import Count, Min, Sum
+
+# Поля, по которым в следующей миграции появятся ограничения уникальности
+UNIQUE_FIELDS = (
+    ('Favourites', ('user', 'recipe')),
+    ('Shoplist', ('user', 'recipe')),
+    ('Follow', ('user', 'author')),
+    ('RecipeIngredient', ('recipes', 'ingredients')),
+    ('RecipeTag', ('recipes', 'tags')),
+)
+
+# Значения этих полей у дублей складываются в оставшуюся запись: прежний
+# список покупок суммировал количества повторяющихся ингредиентов
+SUMMED_FIELDS = {
+    'RecipeIngredient': 'amount',
+}
+
+
+def remove_duplicates(apps, schema_editor):
+    for model_name, fields in UNIQUE_FIELDS:
+        model = apps.get_model('recipes', model_name)
+        summed = SUMMED_FIELDS.get(model_name)
+        annotations = {'first_id': Min('id'), 'total': Count('id')}
+        if summed:
+            annotations['summed'] = Sum(summed)
+        duplicates = model.objects.values(*fields).annotate(
+            **annotations
+        ).filter(total__gt=1).order_by()
+        for row in duplicates:
+            rows = model.objects.filter(
+                **{field: row[field] for field in fields}
+            )
+            if summed:
+                rows.filter(id=row['first_id']).update(
+                    **{summed: row['summed']}
+                )
+            rows.exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_auto_20220907_1511'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
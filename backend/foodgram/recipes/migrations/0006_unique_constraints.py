@@ -0,0 +1,33 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_remove_duplicate_relations'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='favourites',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_favourite'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('recipes', 'ingredients'), name='unique_recipe_ingredient'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipetag',
+            constraint=models.UniqueConstraint(fields=('recipes', 'tags'), name='unique_recipe_tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoplist',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_shoplist'),
+        ),
+    ]
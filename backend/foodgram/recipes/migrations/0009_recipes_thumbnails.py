@@ -0,0 +1,23 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipes_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipes',
+            name='thumbnail_card',
+            field=models.ImageField(blank=True, editable=False, upload_to='thumbnails/', verbose_name='Миниатюра для карточки рецепта'),
+        ),
+        migrations.AddField(
+            model_name='recipes',
+            name='thumbnail_list',
+            field=models.ImageField(blank=True, editable=False, upload_to='thumbnails/', verbose_name='Миниатюра для списка рецептов'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:20
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipes_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipes',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.ContentAddressedStorage(), upload_to='', verbose_name='Изображение готового блюда'),
+        ),
+        migrations.AlterField(
+            model_name='recipes',
+            name='thumbnail_card',
+            field=models.ImageField(blank=True, editable=False, storage=recipes.storage.ContentAddressedStorage(), upload_to='thumbnails/', verbose_name='Миниатюра для карточки рецепта'),
+        ),
+        migrations.AlterField(
+            model_name='recipes',
+            name='thumbnail_list',
+            field=models.ImageField(blank=True, editable=False, storage=recipes.storage.ContentAddressedStorage(), upload_to='thumbnails/', verbose_name='Миниатюра для списка рецептов'),
+        ),
+    ]
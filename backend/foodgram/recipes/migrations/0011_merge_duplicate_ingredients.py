@@ -0,0 +1,44 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:21
+
+from django.db import migrations
+from django.db.models import Count, F, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    Ingredients = apps.get_model('recipes', 'Ingredients')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    duplicates = Ingredients.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        first_id=Min('id'),
+        total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for row in duplicates:
+        extra = Ingredients.objects.filter(
+            name=row['name'],
+            measurement_unit=row['measurement_unit']
+        ).exclude(id=row['first_id'])
+        # Если в рецепте уже есть основной ингредиент, количество дубля
+        # прибавляется к нему, как прежде суммировал список покупок
+        for link in RecipeIngredient.objects.filter(ingredients__in=extra):
+            kept = RecipeIngredient.objects.filter(
+                recipes_id=link.recipes_id,
+                ingredients_id=row['first_id']
+            )
+            if kept.update(amount=F('amount') + link.amount):
+                link.delete()
+            else:
+                link.ingredients_id = row['first_id']
+                link.save(update_fields=['ingredients'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipes_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
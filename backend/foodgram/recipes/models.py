@@ -1,5 +1,9 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import (Count, Exists, F, OuterRef, Prefetch, Subquery,
+                              Window)
+from django.db.models.functions import Coalesce, RowNumber
+from recipes.storage import ContentAddressedStorage
 
 
 class Ingredients(models.Model):
@@ -18,6 +22,12 @@ class Ingredients(models.Model):
         ordering = ['name']
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -52,6 +62,75 @@ class Tags(models.Model):
         verbose_name_plural = 'Теги'
 
 
+class RecipesQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """Готовит рецепты к сериализации за фиксированное число запросов.
+
+        Автор загружается через JOIN, теги и ингредиенты — пакетно,
+        а признаки избранного и корзины вычисляются подзапросами Exists.
+        """
+        queryset = self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_recipe',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredients'
+                )
+            )
+        )
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favourites.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                Shoplist.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
+
+    def latest_by_author(self, author_ids, limit):
+        """Возвращает не больше limit свежих рецептов каждого автора.
+
+        Рецепты нумеруются оконной функцией ROW_NUMBER() в разрезе автора,
+        поэтому превью для всей страницы подписок загружаются одним запросом.
+        """
+        if not author_ids:
+            return []
+        ranked = self.filter(author_id__in=author_ids).annotate(
+            author_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=[F('pub_date').desc(), F('id').desc()]
+            )
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE author_rank <= %s '
+            f'ORDER BY author_id, author_rank',
+            (*params, limit)
+        )
+
+    def rebuild_counters(self):
+        """Пересчитывает счетчики избранного и корзин одним UPDATE."""
+        return self.update(
+            favorites_count=Coalesce(Subquery(
+                Favourites.objects.filter(
+                    recipe=OuterRef('pk')
+                ).values('recipe').annotate(
+                    total=Count('id')
+                ).values('total')
+            ), 0),
+            in_carts_count=Coalesce(Subquery(
+                Shoplist.objects.filter(
+                    recipe=OuterRef('pk')
+                ).values('recipe').annotate(
+                    total=Count('id')
+                ).values('total')
+            ), 0),
+        )
+
+
 class Recipes(models.Model):
     name = models.CharField(
         'Название рецепта',
@@ -67,6 +146,21 @@ class Recipes(models.Model):
     image = models.ImageField(
         'Изображение готового блюда',
         blank=False,
+        storage=ContentAddressedStorage()
+    )
+    thumbnail_list = models.ImageField(
+        'Миниатюра для списка рецептов',
+        upload_to='thumbnails/',
+        blank=True,
+        editable=False,
+        storage=ContentAddressedStorage()
+    )
+    thumbnail_card = models.ImageField(
+        'Миниатюра для карточки рецепта',
+        upload_to='thumbnails/',
+        blank=True,
+        editable=False,
+        storage=ContentAddressedStorage()
     )
     text = models.TextField(
         'Описание приготовления блюда',
@@ -85,6 +179,18 @@ class Recipes(models.Model):
         'Время приготовления'
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'Добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+
+    objects = RecipesQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -93,6 +199,16 @@ class Recipes(models.Model):
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipes_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-pub_date'],
+                name='recipes_popular_idx'
+            ),
+        ]
 
 
 class RecipeIngredient(models.Model):
@@ -116,6 +232,12 @@ class RecipeIngredient(models.Model):
     class Meta:
         verbose_name = 'Рецепт/Ингредиент'
         verbose_name_plural = 'Рецепты/Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipes', 'ingredients'],
+                name='unique_recipe_ingredient'
+            )
+        ]
 
     def __str__(self):
         return f'{self.recipes} добавлен ингредиент {self.ingredients}'
@@ -136,6 +258,12 @@ class RecipeTag(models.Model):
     class Meta:
         verbose_name = 'Рецепт/Тег'
         verbose_name_plural = 'Рецепты/Теги'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipes', 'tags'],
+                name='unique_recipe_tag'
+            )
+        ]
 
     def __str__(self):
         return f'{self.recipes} присвоен тег: {self.tags}'
@@ -158,6 +286,12 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user}, подписан на {self.author}'
@@ -181,6 +315,12 @@ class Favourites(models.Model):
     class Meta:
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_favourite'
+            )
+        ]
 
 
 class Shoplist(models.Model):
@@ -200,3 +340,9 @@ class Shoplist(models.Model):
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Список покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_shoplist'
+            )
+        ]
@@ -0,0 +1,52 @@
+from bisect import bisect_left
+
+from api.caching import get_version
+from recipes.models import Ingredients
+
+
+class IngredientIndex:
+    """Отсортированный по названию индекс ингредиентов в памяти процесса.
+
+    Совпадения по началу названия ищутся бинарным поиском, затем
+    добавляются совпадения по подстроке.
+    """
+
+    def __init__(self, ingredients):
+        entries = sorted(
+            ((ingredient.name.lower(), ingredient.id, ingredient)
+             for ingredient in ingredients),
+            key=lambda entry: entry[:2]
+        )
+        self.keys = [key for key, _, _ in entries]
+        self.ingredients = [ingredient for _, _, ingredient in entries]
+
+    def search(self, query, limit):
+        query = query.lower()
+        result = []
+        position = bisect_left(self.keys, query)
+        while (position < len(self.keys) and len(result) < limit
+               and self.keys[position].startswith(query)):
+            result.append(self.ingredients[position])
+            position += 1
+        if len(result) < limit:
+            for key, ingredient in zip(self.keys, self.ingredients):
+                if query in key and not key.startswith(query):
+                    result.append(ingredient)
+                    if len(result) == limit:
+                        break
+        return result
+
+
+# Индекс текущей версии; старые версии удаляются при перестроении
+_indexes = {}
+
+
+def get_ingredient_index():
+    """Возвращает индекс, перестраивая его после изменения ингредиентов."""
+    version = get_version(Ingredients)
+    index = _indexes.get(version)
+    if index is None:
+        index = IngredientIndex(Ingredients.objects.all())
+        _indexes.clear()
+        _indexes[version] = index
+    return index
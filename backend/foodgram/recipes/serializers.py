@@ -1,8 +1,17 @@
+from collections import Counter
+
+from api.fields import (PrimaryKeyListField, StreamingBase64ImageField,
+                        ThumbnailField, get_objects_in_bulk)
+from api.mixins import UniqueCreateMixin
+from api.relations import get_relations
+from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
+from recipes.exporters import EXPORT_FORMATS
+from recipes.images import process_recipe_image
+from recipes.jobs import get_job_runner
 from recipes.models import (Favourites, Ingredients, RecipeIngredient, Recipes,
-                            Shoplist, Tags)
+                            RecipeTag, Shoplist, Tags)
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 from users.serializers import UserSerializer
 
 
@@ -25,23 +34,20 @@ class IngredientsSerializer(serializers.ModelSerializer):
 
 
 class IngredientsForRecipeSerializer(serializers.ModelSerializer):
-    amount = serializers.SerializerMethodField()
+    id = serializers.ReadOnlyField(source='ingredients.id')
+    name = serializers.ReadOnlyField(source='ingredients.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredients.measurement_unit'
+    )
 
     class Meta:
-        model = Ingredients
-        fields = '__all__'
-
-    def get_amount(self, obj):
-        amount = RecipeIngredient.objects.filter(
-            ingredients=obj).values_list('amount', flat=True)
-        return amount[0]
+        model = RecipeIngredient
+        fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
 class IngredientAddToRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredients.objects.all(),
-        source='ingredients'
-    )
+    # id проверяются разом в RecipeAddUpdateSerializer.validate_ingredients
+    id = serializers.IntegerField(min_value=1)
     amount = serializers.IntegerField()
 
     class Meta:
@@ -51,11 +57,8 @@ class IngredientAddToRecipeSerializer(serializers.ModelSerializer):
 
 class RecipeAddUpdateSerializer(serializers.ModelSerializer):
     ingredients = IngredientAddToRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tags.objects.all()
-    )
-    image = Base64ImageField(max_length=None)
+    tags = PrimaryKeyListField(queryset=Tags.objects.all())
+    image = StreamingBase64ImageField(max_length=None)
     cooking_time = serializers.IntegerField()
 
     class Meta:
@@ -77,29 +80,168 @@ class RecipeAddUpdateSerializer(serializers.ModelSerializer):
             )
         return data
 
+    def validate_ingredients(self, value):
+        ids = [ing['id'] for ing in value]
+        duplicates = sorted(
+            pk for pk, total in Counter(ids).items() if total > 1
+        )
+        errors = []
+        if duplicates:
+            errors.append(
+                'Ингредиенты повторяются: ' + ', '.join(map(str, duplicates))
+            )
+        try:
+            ingredients = get_objects_in_bulk(Ingredients.objects.all(), ids)
+        except serializers.ValidationError as error:
+            errors.extend(error.detail)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [
+            {'ingredients': ingredients[ing['id']], 'amount': ing['amount']}
+            for ing in value
+        ]
+
     def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        for ing in ingredients:
-            if int(ing['amount']) <= 0:
+        for ing in data.get('ingredients', []):
+            if ing['amount'] <= 0:
                 raise serializers.ValidationError(
                     'Количество ингредиента должно быть больше нуля'
                 )
         return data
 
+    @staticmethod
+    def set_tags(recipe, tags):
+        """Добавляет и удаляет только изменившиеся связи с тегами."""
+        current = set(RecipeTag.objects.filter(
+            recipes=recipe
+        ).values_list('tags_id', flat=True))
+        new = {tag.id for tag in tags}
+        if current - new:
+            RecipeTag.objects.filter(
+                recipes=recipe, tags_id__in=current - new
+            ).delete()
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipes=recipe, tags_id=tag_id)
+            for tag_id in new - current
+        )
+
+    @staticmethod
+    def set_ingredients(recipe, ingredients):
+        """Приводит ингредиенты рецепта к переданному списку.
+
+        Новые строки вставляются одним bulk_create, лишние удаляются
+        одним запросом, измененные количества обновляются bulk_update.
+        """
+        current = {
+            row.ingredients_id: row
+            for row in RecipeIngredient.objects.filter(recipes=recipe)
+        }
+        new = {ing['ingredients'].id: ing['amount'] for ing in ingredients}
+        removed = current.keys() - new.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipes=recipe, ingredients_id__in=removed
+            ).delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipes=recipe, ingredients_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new.items()
+            if ingredient_id not in current
+        )
+        changed = []
+        for ingredient_id, row in current.items():
+            amount = new.get(ingredient_id, row.amount)
+            if amount != row.amount:
+                row.amount = amount
+                changed.append(row)
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+
+    @staticmethod
+    def schedule_image_processing(recipe):
+        """Откладывает обработку изображения в фоновую задачу после коммита.
+
+        Загрузка сохраняется как есть, уже проверенной полем image.
+        Пока задача не выполнена, миниатюры пусты и вместо них и
+        пережатого изображения отдается исходный файл.
+        """
+        transaction.on_commit(
+            lambda: get_job_runner().submit(process_recipe_image, recipe.id)
+        )
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            image = self.validated_data.get('image')
+            if image is not None:
+                # Временный файл загрузки уже перенесен в хранилище
+                # или не понадобился; закрываем его сразу, а не в сборщике
+                image.close()
+
+    @transaction.atomic
+    def create(self, validated_data):
+        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags')
+        recipe = Recipes.objects.create(**validated_data)
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipes=recipe, tags=tag) for tag in tags
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipes=recipe,
+                ingredients=ing['ingredients'],
+                amount=ing['amount']
+            )
+            for ing in ingredients
+        )
+        self.schedule_image_processing(recipe)
+        return recipe
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        if 'image' in validated_data:
+            # Пока новое изображение не обработано, отдается исходное
+            validated_data['thumbnail_list'] = ''
+            validated_data['thumbnail_card'] = ''
+        instance = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            self.schedule_image_processing(instance)
+        if tags is not None:
+            self.set_tags(instance, tags)
+        if ingredients is not None:
+            self.set_ingredients(instance, ingredients)
+        return instance
+
     def to_representation(self, instance):
+        request = self.context.get('request')
+        if request is not None:
+            # Перечитываем рецепт с предзагрузкой связей, чтобы ответ
+            # не делал по запросу на каждый ингредиент
+            instance = Recipes.objects.for_user(request.user).get(
+                pk=instance.pk
+            )
         return RecipesSerializer(
             instance,
-            context={'request': self.context.get('request')}
+            context={'request': request}
         ).data
 
 
 class RecipesSerializer(serializers.ModelSerializer):
     tags = TagSerializer(read_only=False, many=True)
     author = UserSerializer(read_only=True, many=False)
-    ingredients = IngredientsForRecipeSerializer(many=True, required=True)
+    ingredients = IngredientsForRecipeSerializer(
+        source='ingredients_recipe',
+        many=True,
+        read_only=True
+    )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField(max_length=None)
+    thumbnail_list = ThumbnailField()
+    thumbnail_card = ThumbnailField()
     pub_date = serializers.DateTimeField(write_only=True, required=False)
 
     class Meta:
@@ -107,37 +249,36 @@ class RecipesSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
+        relations = get_relations(self.context.get('request'))
+        if relations is None:
             return False
-        user = request.user
-        return Favourites.objects.filter(recipe=obj, user=user).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return obj.id in relations.favourite_ids
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
+        relations = get_relations(self.context.get('request'))
+        if relations is None:
             return False
-        user = request.user
-        return Shoplist.objects.filter(recipe=obj, user=user).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return obj.id in relations.cart_ids
 
 
 class RecipeSmallSerializer(serializers.ModelSerializer):
+    thumbnail_list = ThumbnailField()
+
     class Meta:
         model = Recipes
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnail_list', 'cooking_time')
+
 
+class FavouriteSerializer(UniqueCreateMixin, serializers.ModelSerializer):
+    unique_error_message = 'Вы уже добавили рецепт с список избранного'
 
-class FavouriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Favourites
         fields = '__all__'
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Favourites.objects.all(),
-                fields=('user', 'recipe'),
-                message='Вы уже добавили рецепт с список избранного'
-            )
-        ]
 
     def to_representation(self, instance):
         return RecipeSmallSerializer(
@@ -146,20 +287,21 @@ class FavouriteSerializer(serializers.ModelSerializer):
         ).data
 
 
-class ShoppingSerializer(serializers.ModelSerializer):
+class ShoppingSerializer(UniqueCreateMixin, serializers.ModelSerializer):
+    unique_error_message = 'Вы уже добавили рецепт в список покупок'
+
     class Meta:
         model = Shoplist
         fields = '__all__'
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Shoplist.objects.all(),
-                fields=('user', 'recipe'),
-                message='Вы уже добавили рецепт в список покупок'
-            )
-        ]
 
     def to_representation(self, instance):
         return RecipeSmallSerializer(
             instance.recipe,
             context={'request': self.context.get('request')}
         ).data
+
+
+class ShoppingListJobSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(
+        choices=EXPORT_FORMATS, default=EXPORT_FORMATS[0]
+    )
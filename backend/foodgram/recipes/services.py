@@ -0,0 +1,183 @@
+import logging
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Sum
+from recipes.exporters import stream_document
+from recipes.jobs import get_job_runner
+from recipes.models import RecipeIngredient, Shoplist
+
+logger = logging.getLogger(__name__)
+
+CART_VERSION_KEY = 'shopping_list_version:{user_id}'
+DOCUMENT_KEY = 'shopping_list:{user_id}:{version}:{export_format}'
+JOB_KEY = 'shopping_list_job:{job_id}'
+JOB_RESULT_DIR = 'shopping_lists/{user_id}'
+JOB_RESULT_NAME = '{version}.{export_format}'
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+def get_shopping_list(user):
+    """Суммирует ингредиенты из списка покупок пользователя.
+
+    Количество считается на стороне базы данных одним запросом и
+    группируется по названию и единице измерения ингредиента.
+    """
+    return RecipeIngredient.objects.filter(
+        recipes__shop_list__user=user
+    ).values(
+        'ingredients__name',
+        'ingredients__measurement_unit'
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('ingredients__name', 'ingredients__measurement_unit')
+
+
+def get_cart_version(user_id):
+    """Возвращает версию списка покупок — время его последнего изменения."""
+    return cache.get_or_set(
+        CART_VERSION_KEY.format(user_id=user_id), time.time, None
+    )
+
+
+def bump_cart_version(*user_ids):
+    """Помечает списки покупок пользователей как измененные."""
+    version = time.time()
+    cache.set_many(
+        {CART_VERSION_KEY.format(user_id=user_id): version
+         for user_id in user_ids},
+        None
+    )
+
+
+def bump_recipe_carts(recipe):
+    """Обновляет версию списков покупок, в которые входит рецепт."""
+    bump_cart_version(*Shoplist.objects.filter(
+        recipe=recipe
+    ).values_list('user_id', flat=True))
+
+
+def cache_while_streaming(chunks, key):
+    """Пропускает части документа дальше и кладет его в кеш целиком.
+
+    Документ попадает в кеш, только если был отдан до конца.
+    """
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(parts), settings.SHOPPING_LIST_CACHE_TIMEOUT)
+
+
+def get_shopping_list_document(user, export_format):
+    """Возвращает документ списка покупок как итератор частей в байтах.
+
+    Закешированный документ отдается одним куском. При промахе документ
+    отдается по мере формирования и кладется в кеш после последней части.
+    Ключ кеша содержит версию списка покупок, поэтому после изменения
+    корзины старый документ просто перестает запрашиваться.
+    Для пустого списка возвращается None.
+    """
+    key = DOCUMENT_KEY.format(
+        user_id=user.pk,
+        version=get_cart_version(user.pk),
+        export_format=export_format
+    )
+    document = cache.get(key)
+    if document is not None:
+        return iter([document])
+    shopping_list = get_shopping_list(user)
+    if not shopping_list:
+        return None
+    return cache_while_streaming(
+        stream_document(shopping_list, export_format), key
+    )
+
+
+def get_job(job_id):
+    return cache.get(JOB_KEY.format(job_id=job_id))
+
+
+def _save_job(job):
+    cache.set(
+        JOB_KEY.format(job_id=job['id']),
+        job,
+        settings.SHOPPING_LIST_JOB_TIMEOUT
+    )
+
+
+def start_shopping_list_job(user, export_format):
+    """Ставит формирование списка покупок в очередь фоновых задач."""
+    job = {
+        'id': uuid.uuid4().hex,
+        'user_id': user.pk,
+        'format': export_format,
+        'status': JOB_PENDING,
+        'result': None,
+        'error': None,
+    }
+    _save_job(job)
+    get_job_runner().submit(build_shopping_list, job['id'])
+    return job
+
+
+def save_shopping_list_file(user, export_format):
+    """Сохраняет документ в хранилище и возвращает путь к файлу.
+
+    На пользователя и формат хранится один файл для текущей версии
+    корзины: повторные задачи берут готовый файл, а файлы прежних версий
+    удаляются. Для пустого списка возвращается None.
+    """
+    directory = JOB_RESULT_DIR.format(user_id=user.pk)
+    name = JOB_RESULT_NAME.format(
+        version=get_cart_version(user.pk), export_format=export_format
+    )
+    path = f'{directory}/{name}'
+    if default_storage.exists(path):
+        return path
+    document = get_shopping_list_document(user, export_format)
+    if document is None:
+        return None
+    with tempfile.TemporaryFile() as output:
+        for chunk in document:
+            output.write(chunk)
+        path = default_storage.save(path, File(output))
+    _, files = default_storage.listdir(directory)
+    for old_name in files:
+        old_path = f'{directory}/{old_name}'
+        if old_path != path and old_name.endswith(f'.{export_format}'):
+            default_storage.delete(old_path)
+    return path
+
+
+def build_shopping_list(job_id):
+    """Формирует документ и сохраняет его через файловое хранилище."""
+    job = get_job(job_id)
+    if job is None:
+        return
+    job['status'] = JOB_RUNNING
+    _save_job(job)
+    try:
+        user = get_user_model().objects.get(pk=job['user_id'])
+        job['result'] = save_shopping_list_file(user, job['format'])
+        if job['result'] is None:
+            job['status'] = JOB_FAILED
+            job['error'] = 'В списке покупок нет данных!'
+        else:
+            job['status'] = JOB_DONE
+    except Exception:
+        logger.exception('Не удалось сформировать список покупок %s', job_id)
+        job['status'] = JOB_FAILED
+        job['error'] = 'Не удалось сформировать список покупок'
+    finally:
+        _save_job(job)
@@ -0,0 +1,48 @@
+from api.caching import bump_version
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.images import delete_unused_files, recipe_files
+from recipes.models import Favourites, Ingredients, Recipes, Shoplist, Tags
+
+# Счетчик рецепта, который хранит число записей каждой модели
+COUNTERS = {
+    Favourites: 'favorites_count',
+    Shoplist: 'in_carts_count',
+}
+
+
+@receiver([post_save, post_delete], sender=Ingredients)
+@receiver([post_save, post_delete], sender=Tags)
+def reference_data_changed(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(post_delete, sender=Recipes)
+def recipe_deleted(sender, instance, **kwargs):
+    files = recipe_files(instance)
+    transaction.on_commit(lambda: delete_unused_files(files))
+
+
+def change_counter(sender, instance, delta):
+    field = COUNTERS[sender]
+    Recipes.objects.filter(pk=instance.recipe_id).update(
+        **{field: F(field) + delta}
+    )
+
+
+# Счетчики меняются при любом пути создания и удаления записи, включая
+# каскадное удаление пользователя и админку. Фикстуры (raw) и
+# bulk_create сигналов не дают: после них нужен rebuild_recipe_counters.
+@receiver(post_save, sender=Favourites)
+@receiver(post_save, sender=Shoplist)
+def relation_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_counter(sender, instance, 1)
+
+
+@receiver(post_delete, sender=Favourites)
+@receiver(post_delete, sender=Shoplist)
+def relation_deleted(sender, instance, **kwargs):
+    change_counter(sender, instance, -1)
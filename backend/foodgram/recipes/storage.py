@@ -0,0 +1,68 @@
+import hashlib
+import os
+import posixpath
+import time
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — хеш его содержимого.
+
+    Одинаковые файлы сохраняются один раз, а содержимое по одному и тому же
+    адресу никогда не меняется, поэтому его можно кешировать навсегда.
+
+    Файл может понадобиться новому рецепту в тот момент, когда его
+    удаляют как неиспользуемый: save() видит готовый файл, а ссылка на
+    него появится в базе только после коммита. Поэтому save() обновляет
+    время изменения найденного файла, а discard() не трогает файлы,
+    сохраненные недавнее reuse_grace_period секунд.
+    """
+    # Дольше этого не живет ни одна транзакция запроса
+    reuse_grace_period = 10 * 60
+
+    def hashed_name(self, name, content):
+        """Строит имя файла из sha256 содержимого и расширения name."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, digest.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, content, max_length=max_length)
+        return name
+
+    def discard(self, name):
+        """Удаляет файл, если его давно не сохраняли. True, если удален.
+
+        Файл сначала переименовывается: после этого save() его уже не
+        найдет и запишет заново, так что время изменения проверяется без
+        гонки. Недавно сохраненный файл возвращается на место.
+        """
+        path = self.path(name)
+        removed = f'{path}.{uuid.uuid4().hex}.deleting'
+        try:
+            os.rename(path, removed)
+        except FileNotFoundError:
+            return False
+        age = time.time() - os.stat(removed).st_mtime
+        if age < self.reuse_grace_period:
+            os.replace(removed, path)
+            return False
+        os.remove(removed)
+        return True
@@ -0,0 +1,56 @@
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from recipes.models import Favourites, Recipes, Shoplist
+
+
+class RecipeCountersTests(FoodgramTestCase):
+    """Счетчики избранного и корзин верны при любом пути изменения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users(3)
+        cls.recipes = create_recipes(
+            cls.users[:1], 3, create_tags(1), create_ingredients(3)
+        )
+
+    def counters(self, recipe):
+        recipe.refresh_from_db()
+        return recipe.favorites_count, recipe.in_carts_count
+
+    def test_api_add_and_remove(self):
+        recipe = self.recipes[0]
+        self.client.force_authenticate(self.users[1])
+        for suffix in ('favorite', 'shopping_cart'):
+            self.client.post(f'/api/recipes/{recipe.id}/{suffix}/')
+        self.assertEqual(self.counters(recipe), (1, 1))
+        for suffix in ('favorite', 'shopping_cart'):
+            self.client.delete(f'/api/recipes/{recipe.id}/{suffix}/')
+        self.assertEqual(self.counters(recipe), (0, 0))
+
+    def test_direct_and_cascade_deletes(self):
+        recipe = self.recipes[0]
+        for user in self.users:
+            Favourites.objects.create(user=user, recipe=recipe)
+            Shoplist.objects.create(user=user, recipe=recipe)
+        self.assertEqual(self.counters(recipe), (3, 3))
+        # Удаление из админки
+        Favourites.objects.filter(user=self.users[0]).first().delete()
+        self.assertEqual(self.counters(recipe), (2, 3))
+        # Каскад при удалении пользователя
+        self.users[1].delete()
+        self.assertEqual(self.counters(recipe), (1, 2))
+        Shoplist.objects.all().delete()
+        self.assertEqual(self.counters(recipe), (1, 0))
+        self.assertEqual(Recipes.objects.rebuild_counters(), 3)
+        self.assertEqual(self.counters(recipe), (1, 0))
+
+    def test_popular_ordering(self):
+        first, second, third = self.recipes
+        for user in self.users:
+            Favourites.objects.create(user=user, recipe=second)
+        Favourites.objects.create(user=self.users[0], recipe=third)
+        response = self.client.get('/api/recipes/?ordering=popular')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [second.id, third.id, first.id]
+        )
@@ -0,0 +1,42 @@
+import io
+import re
+import time
+
+from django.test import SimpleTestCase
+from recipes.exporters import write_pdf
+
+PAGE_PATTERN = re.compile(rb'/Type /Page[^s]')
+
+
+def make_shopping_list(size):
+    return [
+        {
+            'ingredients__name': f'Ингредиент {number}',
+            'ingredients__measurement_unit': 'г',
+            'total_amount': number + 1,
+        }
+        for number in range(size)
+    ]
+
+
+class WritePdfTests(SimpleTestCase):
+
+    def render(self, size):
+        output = io.BytesIO()
+        write_pdf(make_shopping_list(size), output)
+        return output.getvalue()
+
+    def test_long_list_is_split_into_pages(self):
+        # 35 строк на первой странице и по 37 на следующих
+        self.assertEqual(len(PAGE_PATTERN.findall(self.render(35))), 1)
+        self.assertEqual(len(PAGE_PATTERN.findall(self.render(36))), 2)
+        self.assertEqual(len(PAGE_PATTERN.findall(self.render(500))), 14)
+
+    def test_500_lines_benchmark(self):
+        """Грубая защита от регрессий: 500 строк рендерятся за доли секунды."""
+        self.render(1)
+        started = time.perf_counter()
+        for _ in range(5):
+            self.render(500)
+        elapsed = (time.perf_counter() - started) / 5
+        self.assertLess(elapsed, 2.0, f'500 строк PDF: {elapsed:.3f} с')
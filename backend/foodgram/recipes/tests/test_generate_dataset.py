@@ -0,0 +1,30 @@
+import io
+from datetime import timedelta
+
+from api.tests.base import FoodgramTestCase, create_ingredients
+from django.core.management import call_command
+from django.db.models import Max, Min
+from recipes.models import Recipes
+
+
+class GenerateDatasetTests(FoodgramTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_ingredients(20)
+
+    def test_pub_dates_are_spread(self):
+        call_command(
+            'generate_dataset', users=5, recipes=100, days=30,
+            stdout=io.StringIO()
+        )
+        dates = Recipes.objects.aggregate(
+            first=Min('pub_date'), last=Max('pub_date')
+        )
+        self.assertGreater(dates['last'] - dates['first'], timedelta(days=7))
+        self.assertLessEqual(
+            dates['last'] - dates['first'], timedelta(days=30)
+        )
+        self.assertGreater(
+            Recipes.objects.values('pub_date').distinct().count(), 90
+        )
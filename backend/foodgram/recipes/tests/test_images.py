@@ -0,0 +1,102 @@
+import base64
+import io
+from unittest import mock
+
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from django.core.files.base import ContentFile
+from PIL import Image
+from recipes.images import process_image
+from recipes.models import Recipes
+from recipes.storage import ContentAddressedStorage
+
+
+def make_png(size):
+    buffer = io.BytesIO()
+    Image.new('RGBA', size, (200, 100, 50, 255)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class RecipeImageProcessingTests(FoodgramTestCase):
+    """Загрузка сохраняется как есть, пережатие идет в фоновой задаче."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_users(1)[0]
+        cls.tag = create_tags(1)[0]
+        cls.ingredient = create_ingredients(1)[0]
+
+    def setUp(self):
+        super().setUp()
+        self.storage = Recipes._meta.get_field('image').storage
+        # Файлы этих тестов можно удалять сразу после сохранения
+        patcher = mock.patch.object(
+            ContentAddressedStorage, 'reuse_grace_period', 0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_recipe(self, image):
+        self.client.force_authenticate(self.author)
+        return self.client.post('/api/recipes/', {
+            'ingredients': [{'id': self.ingredient.id, 'amount': 1}],
+            'tags': [self.tag.id],
+            'image': 'data:image/png;base64,'
+                     + base64.b64encode(image).decode(),
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+        }, format='json')
+
+    def test_image_is_processed_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.create_recipe(make_png((2000, 1000)))
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipes.objects.get(pk=response.data['id'])
+        original = recipe.image.name
+        # До выполнения задачи хранится и отдается исходный PNG
+        self.assertTrue(original.endswith('.png'))
+        self.assertFalse(recipe.thumbnail_list)
+        self.assertTrue(response.data['thumbnail_list'].endswith('.png'))
+
+        for callback in callbacks:
+            callback()
+        recipe.refresh_from_db()
+        expected = {
+            'image': (1600, 800),
+            'thumbnail_list': (400, 200),
+            'thumbnail_card': (800, 400),
+        }
+        for field, size in expected.items():
+            with self.subTest(field=field):
+                file = getattr(recipe, field)
+                self.assertTrue(file.name.endswith('.jpg'))
+                with file.open('rb'), Image.open(file) as image:
+                    self.assertEqual(image.size, size)
+        self.assertFalse(self.storage.exists(original))
+
+    def test_newer_upload_wins(self):
+        recipe = create_recipes(
+            [self.author], 1, [self.tag], [self.ingredient], per_recipe=1
+        )[0]
+        recipe.image.save(
+            'first.png', ContentFile(make_png((50, 50))), save=True
+        )
+        stale = Recipes.objects.get(pk=recipe.pk)
+        recipe.image.save(
+            'second.png', ContentFile(make_png((60, 60))), save=True
+        )
+
+        process_image(stale)
+        recipe.refresh_from_db()
+        self.assertTrue(recipe.image.name.endswith('.png'))
+        self.assertFalse(recipe.thumbnail_list)
+        # Файлы устаревшей обработки не остаются в хранилище
+        for file in (stale.thumbnail_list, stale.thumbnail_card):
+            self.assertFalse(self.storage.exists(file.name))
+        self.assertTrue(self.storage.exists(recipe.image.name))
+
+    def test_invalid_image_is_rejected(self):
+        response = self.create_recipe(b'not an image')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
@@ -0,0 +1,71 @@
+import re
+from unittest import skipUnless
+
+from api.tests.base import (FoodgramTestCase, create_ingredients,
+                            create_recipes, create_tags, create_users)
+from django.db import connection
+from recipes.models import (Favourites, Follow, RecipeIngredient, Recipes,
+                            RecipeTag, Shoplist)
+
+
+@skipUnless(
+    connection.vendor in ('sqlite', 'postgresql'),
+    'План запроса проверяется только для SQLite и PostgreSQL'
+)
+class IndexUsageTests(FoodgramTestCase):
+    """Частые запросы выполняются по индексам, а не полным просмотром."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = create_users(2)
+        cls.tag = create_tags(1)[0]
+        cls.ingredient = create_ingredients(1)[0]
+        cls.recipe = create_recipes(
+            [cls.author], 1, [cls.tag], [cls.ingredient], per_recipe=1
+        )[0]
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # На маленьких таблицах планировщик предпочел бы seq scan
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assert_uses_index(self, queryset, name, columns):
+        plan = self.explain(queryset)
+        if connection.vendor == 'postgresql':
+            self.assertIn(name, plan)
+            return
+        # SQLite переносит UniqueConstraint в CREATE TABLE и называет
+        # индекс sqlite_autoindex_*, поэтому сверяем столбцы поиска
+        table = queryset.model._meta.db_table
+        self.assertRegex(plan, re.escape(
+            f'SEARCH {table} USING '
+        ) + r'(COVERING )?INDEX \S+ \(' + re.escape(
+            ' AND '.join(f'{column}=?' for column in columns)
+        ) + r'\)')
+
+    def test_relation_lookups_use_unique_indexes(self):
+        cases = (
+            (Favourites.objects.filter(user=self.user, recipe=self.recipe),
+             'unique_favourite', ('user_id', 'recipe_id')),
+            (Shoplist.objects.filter(user=self.user, recipe=self.recipe),
+             'unique_shoplist', ('user_id', 'recipe_id')),
+            (Follow.objects.filter(user=self.user, author=self.author),
+             'unique_follow', ('user_id', 'author_id')),
+            (RecipeIngredient.objects.filter(
+                recipes=self.recipe, ingredients=self.ingredient
+            ), 'unique_recipe_ingredient', ('recipes_id', 'ingredients_id')),
+            (RecipeTag.objects.filter(recipes=self.recipe, tags=self.tag),
+             'unique_recipe_tag', ('recipes_id', 'tags_id')),
+        )
+        for queryset, name, columns in cases:
+            with self.subTest(index=name):
+                self.assert_uses_index(queryset.values('id'), name, columns)
+
+    def test_recipe_list_ordering_uses_index(self):
+        plan = self.explain(
+            Recipes.objects.order_by('-pub_date', '-id').values('id')[:6]
+        )
+        self.assertIn('recipes_pub_date_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,85 @@
+from api.tests.base import FoodgramTestCase
+from django.test import SimpleTestCase, override_settings
+from recipes.models import Ingredients
+from recipes.search import IngredientIndex
+
+NAMES = (
+    'Сахар', 'сахарная пудра', 'Ванильный сахар', 'Соль', 'Тростниковый сахар',
+    'Сахарин',
+)
+
+
+def make_index(names):
+    return IngredientIndex(
+        Ingredients(id=number, name=name, measurement_unit='г')
+        for number, name in enumerate(names, start=1)
+    )
+
+
+class IngredientIndexTests(SimpleTestCase):
+    """Сначала совпадения по началу названия, затем по подстроке."""
+
+    def setUp(self):
+        self.index = make_index(NAMES)
+
+    def search(self, query, limit=10):
+        return [item.name for item in self.index.search(query, limit)]
+
+    def test_prefix_matches_come_first(self):
+        # Внутри каждой группы — алфавитный порядок без учета регистра
+        self.assertEqual(self.search('сах'), [
+            'Сахар', 'Сахарин', 'сахарная пудра',
+            'Ванильный сахар', 'Тростниковый сахар',
+        ])
+
+    def test_search_is_case_insensitive(self):
+        self.assertEqual(self.search('СОЛ'), ['Соль'])
+
+    def test_limit(self):
+        self.assertEqual(self.search('сах', 2), ['Сахар', 'Сахарин'])
+        self.assertEqual(
+            self.search('сах', 4),
+            ['Сахар', 'Сахарин', 'сахарная пудра', 'Ванильный сахар']
+        )
+
+    def test_no_matches(self):
+        self.assertEqual(self.search('мука'), [])
+
+
+@override_settings(INGREDIENT_SEARCH_LIMIT=3, INGREDIENT_SEARCH_MAX_LIMIT=4)
+class IngredientSearchApiTests(FoodgramTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredients.objects.bulk_create(
+            Ingredients(name=f'Сахар {number}', measurement_unit='г')
+            for number in range(6)
+        )
+
+    def search(self, query):
+        response = self.client.get(f'/api/ingredients/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.data]
+
+    def test_limit_is_clamped(self):
+        cases = (
+            ('name=сах', 3),
+            ('name=сах&limit=2', 2),
+            ('name=сах&limit=100', 4),
+            ('name=сах&limit=0', 1),
+            ('name=сах&limit=-5', 1),
+            ('name=сах&limit=abc', 3),
+        )
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(len(self.search(query)), expected)
+
+    def test_without_name_returns_all(self):
+        self.assertEqual(len(self.search('')), 6)
+
+    def test_index_is_rebuilt_after_change(self):
+        self.assertEqual(self.search('name=соль'), [])
+        Ingredients.objects.create(name='Соль', measurement_unit='г')
+        self.assertEqual(self.search('name=соль'), ['Соль'])
+        Ingredients.objects.filter(name='Соль').get().delete()
+        self.assertEqual(self.search('name=соль'), [])
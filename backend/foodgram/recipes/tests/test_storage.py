@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from recipes.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    """Одинаковое содержимое хранится один раз и не удаляется из-под save."""
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.storage = ContentAddressedStorage(location=location)
+
+    def make_old(self, name):
+        old = time.time() - self.storage.reuse_grace_period - 1
+        os.utime(self.storage.path(name), (old, old))
+
+    def test_same_content_is_saved_once(self):
+        first = self.storage.save('recipes/a.jpg', ContentFile(b'data'))
+        second = self.storage.save('recipes/b.JPG', ContentFile(b'data'))
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith('recipes/'))
+        self.assertTrue(first.endswith('.jpg'))
+        self.assertEqual(self.storage.listdir('recipes')[1], [
+            os.path.basename(first)
+        ])
+
+    def test_discard_removes_old_files(self):
+        name = self.storage.save('a.jpg', ContentFile(b'data'))
+        self.make_old(name)
+        self.assertTrue(self.storage.discard(name))
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(self.storage.discard(name))
+
+    def test_discard_keeps_reused_files(self):
+        name = self.storage.save('a.jpg', ContentFile(b'data'))
+        self.make_old(name)
+        # Другой запрос сохранил то же содержимое и ждет коммита
+        self.storage.save('b.jpg', ContentFile(b'data'))
+        self.assertFalse(self.storage.discard(name))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.listdir('')[1], [name])
+
+    def test_save_during_discard_writes_file_again(self):
+        name = self.storage.save('a.jpg', ContentFile(b'data'))
+        self.make_old(name)
+        path = self.storage.path(name)
+        removed = path + '.deleting'
+        # Состояние между переименованием и удалением в discard()
+        os.rename(path, removed)
+        self.assertEqual(
+            self.storage.save('b.jpg', ContentFile(b'data')), name
+        )
+        os.remove(removed)
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'data')
@@ -1,52 +1,66 @@
-import io
+from datetime import datetime, timezone
 
-import reportlab
-from api.filters import RecipesFilter
+from api.caching import VersionedCacheMixin
+from api.filters import IngredientSearchFilter, RecipesFilter
+from api.pagination import RecipePagination
 from api.permissions import IsAuthorOrReadOnly
-from django.http import FileResponse
+from api.renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
-from foodgram.settings import BASE_DIR
-from recipes.models import (Favourites, Ingredients, RecipeIngredient, Recipes,
-                            RecipeTag, Shoplist, Tags)
+from recipes.images import delete_unused_files, recipe_files
+from recipes.models import Favourites, Ingredients, Recipes, Shoplist, Tags
 from recipes.serializers import (FavouriteSerializer, IngredientsSerializer,
                                  RecipeAddUpdateSerializer, RecipesSerializer,
-                                 ShoppingSerializer, TagSerializer)
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+                                 ShoppingListJobSerializer, ShoppingSerializer,
+                                 TagSerializer)
+from recipes.services import (JOB_DONE, bump_cart_version, bump_recipe_carts,
+                              get_cart_version, get_job,
+                              get_shopping_list_document,
+                              start_shopping_list_job)
 from rest_framework import mixins, status, views, viewsets
-from rest_framework.filters import SearchFilter
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 
-class TagViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
-                 viewsets.GenericViewSet):
+class TagViewSet(VersionedCacheMixin, mixins.ListModelMixin,
+                 mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    cache_models = (Tags,)
     queryset = Tags.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
     pagination_class = None
 
 
-class IngredientsViewSet(viewsets.ModelViewSet):
+class IngredientsViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
+    cache_models = (Ingredients,)
+    # Подсказки быстро строятся по индексу в памяти, кешировать их незачем
+    uncached_params = (api_settings.SEARCH_PARAM,)
     queryset = Ingredients.objects.all()
     serializer_class = IngredientsSerializer
     permission_classes = [AllowAny]
     pagination_class = None
-    filter_backends = [SearchFilter]
-    search_fields = ['name']
+    filter_backends = [IngredientSearchFilter]
 
 
 class RecipesViewSet(viewsets.ModelViewSet):
     queryset = Recipes.objects.all()
     permission_classes = [IsAuthorOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = RecipePagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipesFilter
     http_method_names = ['get', 'post', 'patch', 'delete']
 
+    def get_queryset(self):
+        return Recipes.objects.for_user(self.request.user)
+
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return RecipeAddUpdateSerializer
@@ -57,44 +71,24 @@ class RecipesViewSet(viewsets.ModelViewSet):
         context.update({"request": self.request})
         return context
 
-    def create(self, request, *args, **kwargs):
-        request.data['author'] = request.user
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        ingredients = serializer.validated_data.pop('ingredients')
-        instance = serializer.save(author=request.user)
-        for ing in ingredients:
-            RecipeIngredient.objects.bulk_create([RecipeIngredient(
-                recipes=instance,
-                amount=ing['amount'],
-                ingredients=ing['ingredients'])])
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)
 
-    def perform_create(self, serializer, *args, **kwargs):
-        serializer.save(serializer.validated_data)
+    def perform_update(self, serializer):
+        old_files = recipe_files(serializer.instance)
+        serializer.save()
+        bump_recipe_carts(serializer.instance)
+        replaced = old_files - recipe_files(serializer.instance)
+        if replaced:
+            transaction.on_commit(lambda: delete_unused_files(replaced))
 
-    def update(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data,
-                                         partial=True)
-        serializer.is_valid(raise_exception=True)
-        ingredients = serializer.validated_data.pop('ingredients')
-        tags = serializer.validated_data.pop('tags')
-        RecipeIngredient.objects.filter(recipes=instance).delete()
-        RecipeTag.objects.filter(recipes=instance).delete()
-        instance.name = serializer.validated_data.pop('name')
-        instance.text = serializer.validated_data.pop('text')
-        if serializer.validated_data.get('image') is not None:
-            instance.image = serializer.validated_data.pop('image')
-        instance.cooking_time = serializer.validated_data.pop('cooking_time')
-        instance.tags.set(tags)
-        for ing in ingredients:
-            RecipeIngredient.objects.bulk_create([RecipeIngredient(
-                recipes=instance,
-                amount=ing['amount'],
-                ingredients=ing['ingredients'])])
-        self.perform_update(serializer)
-        return Response(serializer.data)
+    def perform_destroy(self, instance):
+        # Запоминаем владельцев корзин до каскадного удаления
+        user_ids = list(Shoplist.objects.filter(
+            recipe=instance
+        ).values_list('user_id', flat=True))
+        instance.delete()
+        bump_cart_version(*user_ids)
 
 
 class FavouriteViewSet(viewsets.ModelViewSet):
@@ -140,6 +134,7 @@ class ShoplistViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=data_my)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        bump_cart_version(request.user.id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer, *args, **kwargs):
@@ -147,63 +142,119 @@ class ShoplistViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         favourite = kwargs.get('id')
-        if Shoplist.objects.filter(user=request.user.id, recipe=favourite):
-            Shoplist.objects.filter(
-                user=request.user.id,
-                recipe=favourite
-            ).delete()
+        deleted, _ = Shoplist.objects.filter(
+            user=request.user.id,
+            recipe=favourite
+        ).delete()
+        if deleted:
+            bump_cart_version(request.user.id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+def shopping_list_etag(request, *args, **kwargs):
+    version = get_cart_version(request.user.pk)
+    return f'{request.user.pk}-{version}-{request.accepted_renderer.format}'
+
+
+def shopping_list_last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(
+        get_cart_version(request.user.pk), tz=timezone.utc
+    )
+
+
 class ShopListDownload(views.APIView):
     permission_classes = [IsAuthenticated]
     http_method_names = ['get']
+    # Первый рендерер используется по умолчанию, поэтому без ?format=
+    # и заголовка Accept по-прежнему отдается PDF.
+    renderer_classes = [PDFRenderer, PlainTextRenderer, CSVRenderer]
 
+    @method_decorator(condition(
+        etag_func=shopping_list_etag,
+        last_modified_func=shopping_list_last_modified
+    ))
     def get(self, request):
-        data = {}
-        ingredients = RecipeIngredient.objects.filter(
-            recipes__shop_list__user=request.user
-        )
+        renderer = request.accepted_renderer
+        document = get_shopping_list_document(request.user, renderer.format)
         # Проверяем, есть ли данные в списке
-        if len(ingredients) == 0:
+        if document is None:
             return Response('В списке покупок нет данных!')
 
-        for ing in ingredients:
-            name = ing.ingredients.name
-            amount = ing.amount
-            measurement_unit = ing.ingredients.measurement_unit
-            if name not in data:
-                data[name] = {
-                    'measurement_unit': measurement_unit,
-                    'amount': amount
-                }
-            else:
-                data[name]['amount'] += amount
-
-        for_print = ([f"{item}: {value['amount']}"
-                      f" {value['measurement_unit']}"
-                      for item, value in data.items()])
-
-        # Готовим ReportLab для работы
-        reportlab.rl_config.TTFSearchPath.append(str(BASE_DIR))
-        pdfmetrics.registerFont(TTFont('DejaVuSans', 'DejaVuSans.ttf'))
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=A4)
-        p.setFont('DejaVuSans', 20)
-        p.drawString(20, 800, 'Для ваших рецептов нужно купить:')
-        p.setFont('DejaVuSans', 14)
-        iter = 0
-        for i in for_print:
-            p.drawString(20, 750 - iter, f'{i}')
-            iter += 20
-        p.setFont('DejaVuSans', 10)
-        p.drawString(20, 40, 'Foodgram by Pavel Agapov, 2022')
-        p.drawString(20, 25, 'All rights reserved')
-        p.showPage()
-        p.save()
-
-        # FileResponse sets the Content-Disposition header so that browsers
-        # present the option to save the file.
-        buffer.seek(0)
-        return FileResponse(buffer, as_attachment=True, filename='hello.pdf')
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(document, content_type=content_type)
+        # Content-Disposition нужен, чтобы браузер предложил сохранить файл
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
+        )
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if isinstance(response, Response):
+            # Сообщения и ошибки отдаем в JSON при любом формате выгрузки
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+        return response
+
+
+class ShopListJobViewSet(viewsets.ViewSet):
+    """Формирование списка покупок в фоне, без занятия потока запроса."""
+    permission_classes = [IsAuthenticated]
+
+    def get_job(self, job_id):
+        job = get_job(job_id)
+        if job is None or job['user_id'] != self.request.user.pk:
+            raise NotFound('Задача не найдена')
+        return job
+
+    def get_job_data(self, job):
+        data = {
+            'id': job['id'],
+            'status': job['status'],
+            'format': job['format'],
+            'result': None,
+            'error': job['error'],
+        }
+        if job['status'] == JOB_DONE:
+            data['result'] = self.request.build_absolute_uri(reverse(
+                'shopping-list-job-result', kwargs={'job_id': job['id']}
+            ))
+        return data
+
+    def create(self, request, *args, **kwargs):
+        serializer = ShoppingListJobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = start_shopping_list_job(
+            request.user, serializer.validated_data['format']
+        )
+        # Задача могла успеть выполниться, поэтому перечитываем состояние
+        job = get_job(job['id']) or job
+        return Response(
+            self.get_job_data(job), status=status.HTTP_202_ACCEPTED
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        job = self.get_job(kwargs.get('job_id'))
+        return Response(self.get_job_data(job))
+
+    def result(self, request, *args, **kwargs):
+        job = self.get_job(kwargs.get('job_id'))
+        if job['status'] != JOB_DONE:
+            return Response(
+                self.get_job_data(job), status=status.HTTP_409_CONFLICT
+            )
+        try:
+            file = default_storage.open(job['result'])
+        except FileNotFoundError:
+            # Корзина с тех пор изменилась, и файл заменен новой версией
+            raise NotFound('Файл устарел, сформируйте список заново')
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f'shopping_list.{job["format"]}'
+        )
@@ -1,10 +1,12 @@
 import re
 
+from api.fields import ThumbnailField
+from api.mixins import UniqueCreateMixin
+from api.relations import get_relations
 from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.password_validation import validate_password as pass_v
 from recipes.models import Follow, Recipes
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 from users.models import User
 
 
@@ -63,11 +65,12 @@ class UserSerializer(serializers.ModelSerializer):
         return representation
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
+        relations = get_relations(self.context.get('request'))
+        if relations is None:
             return False
-        user = request.user
-        return Follow.objects.filter(user=user, author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in relations.followed_ids
 
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -94,9 +97,20 @@ class ChangePasswordSerializer(serializers.Serializer):
 # RecipeSmallSerializer создан повторно в этом файле, чтобы избежать проблемы
 # цикличных импортов
 class RecipeSmallSerializer(serializers.ModelSerializer):
+    thumbnail_list = ThumbnailField()
+
     class Meta:
         model = Recipes
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnail_list', 'cooking_time')
+
+
+def get_recipes_limit(request, default=3):
+    """Читает параметр recipes_limit — сколько рецептов показать у автора."""
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (AttributeError, KeyError, ValueError):
+        return default
+    return max(limit, 0)
 
 
 class UserSmallSerializer(serializers.ModelSerializer):
@@ -119,44 +133,33 @@ class UserSmallSerializer(serializers.ModelSerializer):
         lookup_field = 'id'
 
     def get_recipes(self, obj):
-        recipes = obj.recipes.all()[:3]
+        if hasattr(obj, 'preview_recipes'):
+            recipes = obj.preview_recipes
+        else:
+            limit = get_recipes_limit(self.context.get('request'))
+            recipes = obj.recipes.all()[:limit]
         return RecipeSmallSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
+        relations = get_relations(self.context.get('request'))
+        if relations is None:
             return False
-        user = request.user
-        return Follow.objects.filter(user=user, author=obj).exists()
-
-
-class FollowSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Follow
-        fields = ('author',)
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in relations.followed_ids
 
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        return UserSmallSerializer(
-            instance.author,
-            context={'request': request}
-        ).data
 
+class FollowAddSerializer(UniqueCreateMixin, serializers.ModelSerializer):
+    unique_error_message = 'Вы уже подписаны'
 
-class FollowAddSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = '__all__'
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Follow.objects.all(),
-                fields=('user', 'author'),
-                message='Вы уже подписаны'
-            )
-        ]
 
     # def create(self, validated_data):
     #     user = validated_data.pop('user')
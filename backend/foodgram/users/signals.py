@@ -0,0 +1,17 @@
+from api.authentication import invalidate_token, invalidate_user_tokens
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    # Деактивация и прочие изменения сразу видны аутентификации
+    if not created:
+        invalidate_user_tokens(instance.id)
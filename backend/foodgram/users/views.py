@@ -1,5 +1,8 @@
-from django.shortcuts import get_object_or_404
-from recipes.models import Follow
+from collections import defaultdict
+
+from api.authentication import invalidate_user_tokens
+from django.db.models import BooleanField, Count, Value
+from recipes.models import Follow, Recipes
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
@@ -7,7 +10,8 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from users.models import User
 from users.serializers import (ChangePasswordSerializer, FollowAddSerializer,
-                               FollowSerializer, UserSerializer)
+                               UserSerializer, UserSmallSerializer,
+                               get_recipes_limit)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -46,17 +50,38 @@ class UserViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             password = serializer.data['new_password']
             User.objects.filter(username=username).update(password=password)
+            # update() не отправляет post_save, поэтому сбрасываем кеш сами
+            invalidate_user_tokens(request.user.id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class FollowListViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
-    serializer_class = FollowSerializer
+    serializer_class = UserSmallSerializer
 
     def get_queryset(self):
-        user = get_object_or_404(User, id=self.request.user.pk)
-        return user.follower.all()
+        # В списке только авторы, на которых подписан пользователь,
+        # поэтому is_subscribed всегда истинно и не требует запроса.
+        # Порядок прежний — по времени подписки, старые первыми.
+        return User.objects.filter(
+            followed__user=self.request.user
+        ).annotate(
+            recipes_count=Count('recipes'),
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).order_by('followed__id')
+
+    def list(self, request, *args, **kwargs):
+        authors = self.paginate_queryset(self.get_queryset())
+        previews = defaultdict(list)
+        for recipe in Recipes.objects.latest_by_author(
+            [author.id for author in authors], get_recipes_limit(request)
+        ):
+            previews[recipe.author_id].append(recipe)
+        for author in authors:
+            author.preview_recipes = previews[author.id]
+        serializer = self.get_serializer(authors, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class FollowAddViewSet(viewsets.ModelViewSet):